@@ -0,0 +1,38 @@
+"""Command plugins for Pixel Pet
+
+Each plugin declares its trigger patterns here; the module that implements
+it is only imported the first time the command is used. To add a command,
+write a handler `def handler(context, **slots) -> bool` in a module of this
+package and list it below - the dispatcher in main.py needs no changes.
+
+Patterns use the intent grammar: whole-word tokens, {slot} placeholders
+and ^ / $ anchors. Shared slot values live in INTENT_SLOTS in main.py; a
+plugin declares values only it uses in slots. The longest match wins, ties
+go to the plugin listed first. timeout (seconds) overrides the default
+action timeout for slow commands.
+
+A plugin module may also define report() and shutdown() for state it keeps
+between commands; they are called only once the module has been loaded.
+"""
+
+import collections
+
+CommandPlugin = collections.namedtuple("CommandPlugin", "name patterns module function timeout slots",
+                                       defaults=(None, None))
+
+COMMAND_PLUGINS = [
+    CommandPlugin("open_site", ["open {site}", "go to {site}", "^ {site} $"], "commands.web", "open_site"),
+    CommandPlugin("open_website", ["open site", "open website", "open a website"], "commands.web", "open_website"),
+    CommandPlugin("volume_up", ["volume up", "turn it up", "louder"], "commands.system", "volume_up"),
+    CommandPlugin("volume_down", ["volume down", "turn it down", "quieter"], "commands.system", "volume_down"),
+    CommandPlugin("mute", ["mute"], "commands.system", "mute"),
+    CommandPlugin("time", ["time", "what time is it"], "commands.clock", "tell_time"),
+    CommandPlugin("screenshot", ["screenshot", "screen shot", "take a screenshot", "screenshot {region}", "screenshot the {region}"],
+                  "commands.screenshot", "take_screenshot",
+                  slots={"region": ["left half", "right half", "top half", "bottom half"]}),  # see SCREEN_REGIONS
+    CommandPlugin("window_screenshot", ["screenshot window", "screenshot this window", "screenshot the window", "window screenshot"],
+                  "commands.screenshot", "take_window_screenshot"),
+    CommandPlugin("copy_screenshot", ["copy screenshot", "copy last screenshot", "copy the last screenshot"],
+                  "commands.screenshot", "copy_last_screenshot"),
+    CommandPlugin("minimize", ["minimize", "show desktop"], "commands.system", "minimize"),
+]
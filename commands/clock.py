@@ -0,0 +1,10 @@
+"""Time query"""
+
+import time
+
+
+def tell_time(context):
+    current_time = time.strftime("%I:%M %p")
+    context.tts.speak(context.time_words(), key="time")
+    print(f" Time: {current_time}")
+    return True
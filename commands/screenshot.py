@@ -0,0 +1,203 @@
+"""Screenshot commands, and the pipeline that captures and stores the shots"""
+
+import collections
+import glob
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCREENSHOT_DIR = "screenshots"  # relative to the application path
+SCREENSHOT_FORMAT = "png"       # "png", "jpeg" or "webp"
+SCREENSHOT_QUALITY = 85         # jpeg / webp quality
+SCREENSHOT_PNG_COMPRESSION = 1  # zlib level for png - 1 is much faster than the default and barely larger
+SCREENSHOT_MAX_MB = 200         # oldest files are deleted past this total
+SCREENSHOT_MEMORY = 5           # recent shots kept in memory for "copy last screenshot"
+SCREEN_REGIONS = {              # spoken region -> (left, top, right, bottom) as fractions of the screen
+    "left half": (0, 0, 0.5, 1), "right half": (0.5, 0, 1, 1),
+    "top half": (0, 0, 1, 0.5), "bottom half": (0, 0.5, 1, 1),
+}
+
+Screenshot = collections.namedtuple("Screenshot", "image captured_at saved")
+
+
+class ScreenshotPipeline:
+    """Fast grab on the caller's thread, encoding and retention on a background one
+    
+    capture() only grabs pixels and returns; a single encoder thread writes
+    the file in SCREENSHOT_FORMAT and prunes the directory to
+    SCREENSHOT_MAX_MB. The last SCREENSHOT_MEMORY shots stay in memory so
+    the most recent one can be copied without touching the disk.
+    """
+    
+    def __init__(self, directory, latency_tracker):
+        self.directory = directory
+        self.recent = collections.deque(maxlen=SCREENSHOT_MEMORY)
+        self.encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshot")
+        self.capture_time = latency_tracker()
+        self.encode_time = latency_tracker()
+        self.stats = collections.Counter()
+        self.lock = threading.Lock()  # capture() runs on any action worker
+        os.makedirs(directory, exist_ok=True)
+    
+    def _bbox(self, region=None, window=False):
+        """Screen rectangle to grab, None for the full screen"""
+        if window:
+            try:
+                import pygetwindow  # installed with pyautogui
+                active = pygetwindow.getActiveWindow()
+                if active and active.width > 0 and active.height > 0:
+                    return (active.left, active.top, active.left + active.width, active.top + active.height)
+            except Exception as e:
+                print(f" Active window unavailable ({e}) - capturing the full screen")
+        if region:
+            import pyautogui
+            width, height = pyautogui.size()
+            left, top, right, bottom = SCREEN_REGIONS[region]
+            return (int(left * width), int(top * height), int(right * width), int(bottom * height))
+        return None
+    
+    def capture(self, region=None, window=False):
+        """Grab the screen (or a region / the active window); returns a Screenshot"""
+        from PIL import ImageGrab
+        bbox = self._bbox(region, window)
+        start = time.perf_counter()
+        image = ImageGrab.grab(bbox=bbox)
+        self.capture_time.record(time.perf_counter() - start)
+        
+        captured_at = time.time()
+        with self.lock:
+            self.stats["captured"] += 1
+            number = self.stats["captured"]  # keeps file names unique within one second
+        saved = self.encoder.submit(self._encode, image, captured_at, number)
+        saved.add_done_callback(self._saved)
+        shot = Screenshot(image, captured_at, saved)
+        self.recent.append(shot)
+        return shot
+    
+    def _encode(self, image, captured_at, number):
+        """Write one shot to disk and apply retention; returns the path"""
+        extension = "jpg" if SCREENSHOT_FORMAT == "jpeg" else SCREENSHOT_FORMAT
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(captured_at))
+        path = os.path.join(self.directory, f"screenshot_{stamp}_{number:03d}.{extension}")
+        
+        start = time.perf_counter()
+        if SCREENSHOT_FORMAT == "png":
+            image.save(path, "PNG", compress_level=SCREENSHOT_PNG_COMPRESSION)
+        else:
+            image.convert("RGB").save(path, SCREENSHOT_FORMAT.upper(), quality=SCREENSHOT_QUALITY)
+        self.encode_time.record(time.perf_counter() - start)
+        self.stats["bytes"] += os.path.getsize(path)
+        print(f" Screenshot saved: {path}")
+        
+        self._prune()
+        return path
+    
+    def _saved(self, saved):
+        """Log a shot that could not be written (disk full, format, permissions)"""
+        if not saved.cancelled() and saved.exception() is not None:
+            with self.lock:
+                self.stats["failed"] += 1
+            print(f" Screenshot could not be saved: {saved.exception()}")
+    
+    def _prune(self):
+        """Delete the oldest screenshots until the directory fits SCREENSHOT_MAX_MB"""
+        files = sorted(glob.glob(os.path.join(self.directory, "screenshot_*")), key=os.path.getmtime)
+        sizes = {path: os.path.getsize(path) for path in files}
+        total = sum(sizes.values())
+        for path in files[:-1]:  # never the one just written
+            if total <= SCREENSHOT_MAX_MB * 1024 * 1024:
+                break
+            os.remove(path)
+            total -= sizes[path]
+            self.stats["pruned"] += 1
+    
+    def last(self):
+        return self.recent[-1] if self.recent else None
+    
+    def copy_last(self):
+        """Put the most recent shot on the clipboard; False if there is none or no clipboard support"""
+        shot = self.last()
+        if shot is None:
+            return False
+        try:
+            import io
+            import win32clipboard  # pywin32 - optional
+        except ImportError:
+            print(" Copying images needs pywin32 (pip install pywin32)")
+            return False
+        
+        output = io.BytesIO()
+        shot.image.convert("RGB").save(output, "BMP")
+        data = output.getvalue()[14:]  # clipboard wants a DIB: BMP without its file header
+        win32clipboard.OpenClipboard()
+        try:
+            win32clipboard.EmptyClipboard()
+            win32clipboard.SetClipboardData(win32clipboard.CF_DIB, data)
+        finally:
+            win32clipboard.CloseClipboard()
+        return True
+    
+    def report(self):
+        return (f"Screenshots: {self.stats.get('captured', 0)} captured, {self.stats.get('failed', 0)} failed to save, "
+                f"{self.stats.get('bytes', 0) / 1024 / 1024:.1f} MB written, {self.stats.get('pruned', 0)} pruned\n"
+                + self.capture_time.summary("Screenshot capture") + "\n"
+                + self.encode_time.summary(f"Screenshot encode ({SCREENSHOT_FORMAT})"))
+    
+    def shutdown(self):
+        self.encoder.shutdown(wait=True)  # let queued files finish writing
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def pipeline(context):
+    """The ScreenshotPipeline, created the first time a command needs it"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = ScreenshotPipeline(os.path.join(context.data_dir, SCREENSHOT_DIR), context.latency_tracker)
+        return _pipeline
+
+
+def report():
+    return _pipeline.report() if _pipeline else None
+
+
+def shutdown():
+    if _pipeline:
+        _pipeline.shutdown()
+
+
+def take_screenshot(context, region=None, window=False):
+    try:
+        shot = pipeline(context).capture(region=region, window=window)
+        context.tts.speak("SCREENSHOT TAKEN", key="screenshot")
+    except Exception as e:
+        print(f" Screenshot error: {e}")
+        context.tts.speak("SCREENSHOT FAILED", priority=context.high_priority, key="screenshot")
+        return True
+    # The file is written in the background - own up if that fails after all
+    shot.saved.add_done_callback(lambda saved: _report_save_failure(context, saved))
+    return True
+
+
+def _report_save_failure(context, saved):
+    if not saved.cancelled() and saved.exception() is not None:
+        context.tts.play_earcon("error")
+        context.tts.speak("SCREENSHOT FAILED", priority=context.high_priority, key="screenshot")
+
+
+def take_window_screenshot(context):
+    return take_screenshot(context, window=True)
+
+
+def copy_last_screenshot(context):
+    shots = pipeline(context)
+    if shots.last() is None:
+        context.tts.speak("NO SCREENSHOT YET")
+    elif shots.copy_last():
+        context.tts.speak("SCREENSHOT COPIED")
+    else:
+        context.tts.speak("SCREENSHOT FAILED", priority=context.high_priority)
+    return True
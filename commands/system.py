@@ -0,0 +1,27 @@
+"""Volume and window commands"""
+
+import pyautogui
+
+
+def volume_up(context):
+    pyautogui.press("volumeup")
+    context.tts.speak("VOLUME UP", key="volume")
+    return True
+
+
+def volume_down(context):
+    pyautogui.press("volumedown")
+    context.tts.speak("VOLUME DOWN", key="volume")
+    return True
+
+
+def mute(context):
+    pyautogui.press("volumemute")
+    context.tts.speak("MUTED", key="volume")
+    return True
+
+
+def minimize(context):
+    pyautogui.hotkey('win', 'd')
+    context.tts.speak("MINIMIZED")
+    return True
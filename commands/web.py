@@ -0,0 +1,17 @@
+"""Browser commands"""
+
+import webbrowser
+
+
+def open_site(context, site):
+    url = context.sites[site]
+    webbrowser.open(url)
+    context.tts.speak(f"OPENING {site.upper()}")
+    print(f"✓ Opened {url}")
+    return True
+
+
+def open_website(context):
+    context.tts.speak("WHICH SITE?")
+    # Note: This would need additional mic access - simplified for now
+    return True
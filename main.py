@@ -1,18 +1,87 @@
-import tkinter as tk
-from tkinter import scrolledtext
+import time
+_module_started = time.perf_counter()  # startup timing includes imports
+
 import sys
 import random
-from PIL import Image, ImageTk
 import os
-import time
-import pyttsx3
-import speech_recognition as sr
-import pyautogui
-import webbrowser
+import math
 import threading
 import queue
+import collections
+import audioop
+import glob
+import importlib
+import importlib.util
+import json
+import contextlib
+import argparse
+import asyncio
+import array
+import re
+import hashlib
+import shutil
+import heapq
+import itertools
+import tempfile
+import wave
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from enum import Enum, auto
 
+from commands import COMMAND_PLUGINS
+
+
+# DEFERRED IMPORTS
+# Tk is imported only when the pet is shown (headless runs without it), the
+# voice stack by import_voice_stack() once the pet is on screen, automation
+# libraries (pyautogui, webbrowser, PIL) by the command plugins that use them
+tk = None
+sr = None
+pyttsx3 = None
+DEFERRED_IMPORT_TIMES = {}  # module -> seconds spent importing it
+
+
+@contextlib.contextmanager
+def deferred_import(name):
+    """Time the import statement inside the block (if it actually imports)"""
+    loaded = name in sys.modules
+    started = time.perf_counter()
+    yield
+    if not loaded:
+        DEFERRED_IMPORT_TIMES.setdefault(name, time.perf_counter() - started)
+
+
+def import_voice_stack():
+    """Bind sr and pyttsx3 - call before creating any voice component"""
+    global sr, pyttsx3
+    # Plain import statements so freezing tools still find the modules
+    with deferred_import("pyttsx3"):
+        import pyttsx3
+    with deferred_import("speech_recognition"):
+        import speech_recognition as sr
+
+
+def import_gui_toolkit():
+    """Bind tk - only the pet window needs it"""
+    global tk
+    with deferred_import("tkinter"):
+        import tkinter as tk
+
+
+_voice_classes = {}
+
+
+def voice_class(mixin, base_name):
+    """mixin combined with a speech_recognition base class, built on first use
+    
+    speech_recognition checks isinstance() on sources and audio data, but
+    subclassing at class definition would import it with this module.
+    """
+    cls = _voice_classes.get(mixin)
+    if cls is None:
+        cls = _voice_classes[mixin] = type(mixin.__name__, (mixin, getattr(sr, base_name)), {})
+    return cls
+
 
 # CONFIGURATION
 class ListeningState(Enum):
@@ -21,11 +90,36 @@ class ListeningState(Enum):
     WAKE_WORD_DETECTED = auto()
     LISTENING_FOR_COMMAND = auto()
     PROCESSING = auto()
-    SPEAKING = auto()
+    PAUSED = auto()
+
+# Allowed transitions - anything else is rejected by StateManager
+STATE_TRANSITIONS = {
+    ListeningState.IDLE: {ListeningState.WAKE_WORD_DETECTED, ListeningState.PROCESSING, ListeningState.PAUSED},
+    ListeningState.WAKE_WORD_DETECTED: {ListeningState.LISTENING_FOR_COMMAND, ListeningState.PROCESSING,
+                                        ListeningState.IDLE, ListeningState.PAUSED},
+    ListeningState.LISTENING_FOR_COMMAND: {ListeningState.PROCESSING, ListeningState.IDLE, ListeningState.PAUSED},
+    ListeningState.PROCESSING: {ListeningState.IDLE, ListeningState.PAUSED},
+    ListeningState.PAUSED: {ListeningState.IDLE},
+}
+
+# Seconds a state may last before the watchdog drops back to IDLE
+STATE_TIMEOUTS = {
+    ListeningState.WAKE_WORD_DETECTED: 5.0,
+    ListeningState.LISTENING_FOR_COMMAND: 15.0,
+    ListeningState.PROCESSING: 10.0,
+}
 
 # Wake words
 WAKE_WORDS = ["hey pixel", "okay pixel", "ok pixel", "pixel"]
 
+# Words that cut the assistant off mid-sentence (barge-in)
+STOP_WORDS = ["stop", "quiet", "cancel", "enough", "shut up"]
+
+# Local wake word stage (runs before any cloud recognition)
+WAKE_WORD_SENSITIVITY = 0.5     # 0 = strict (more false rejects), 1 = lenient (more false accepts)
+WAKE_WORD_MIN_SECONDS = 0.3     # shortest speech that can contain "pixel"
+WAKE_WORD_FRAME_MS = 20
+
 # Startup greetings
 STARTUP_GREETINGS = [
     "HEY! I WAS JUST WAITING FOR YOU",
@@ -47,273 +141,2732 @@ COMMON_SITES = {
     "amazon": "https://amazon.com"
 }
 
+# Fixed responses pre-rendered into the phrase cache
+CACHED_PHRASES = [
+    "YES?", "VOLUME UP", "VOLUME DOWN", "MUTED", "MINIMIZED",
+    "SCREENSHOT TAKEN", "SCREENSHOT FAILED", "SCREENSHOT COPIED", "NO SCREENSHOT YET", "WHICH SITE?",
+    "I DID NOT HEAR ANYTHING", "I DID NOT UNDERSTAND", "SORRY SOMETHING WENT WRONG", "I AM STILL BUSY",
+    "LISTENING PAUSED", "LISTENING RESUMED",
+    "I CAN ONLY DO SYSTEM COMMANDS. NO AI CHAT IN THIS VERSION",
+] + STARTUP_GREETINGS + [f"OPENING {site_name.upper()}" for site_name in COMMON_SITES]
+PHRASE_CACHE_DIR = os.path.join("cache", "speech")  # relative to the application path
+PHRASE_RENDER_PREFIX = ".render-"  # in-progress renders; renamed into place once complete
+
+# Word fragments stitched together for templated responses (time, numbers)
+NUMBER_WORDS = ["ZERO", "ONE", "TWO", "THREE", "FOUR", "FIVE", "SIX", "SEVEN", "EIGHT", "NINE",
+                "TEN", "ELEVEN", "TWELVE", "THIRTEEN", "FOURTEEN", "FIFTEEN", "SIXTEEN",
+                "SEVENTEEN", "EIGHTEEN", "NINETEEN"]
+TENS_WORDS = ["TWENTY", "THIRTY", "FORTY", "FIFTY", "SIXTY", "SEVENTY", "EIGHTY", "NINETY"]
+TEMPLATE_FRAGMENTS = ["THE TIME IS", "OH", "O'CLOCK", "AM", "PM", "PERCENT"] + NUMBER_WORDS + TENS_WORDS
+TEMPLATE_WORD_GAP = 0.06      # silence between stitched fragments
+TEMPLATE_FADE_SECONDS = 0.008  # ramp at each fragment edge so joins don't click
+TEMPLATE_TRIM_RATIO = 0.05     # frames quieter than this fraction of the peak are trimmed
+
 # Audio configuration
 ENERGY_THRESHOLD = 300
 PAUSE_THRESHOLD = 0.8
 LISTEN_TIMEOUT = 5
 PHRASE_TIME_LIMIT = 10
 
+# Speech queue priorities (lower plays first) and expiry
+SPEECH_PRIORITY_HIGH = 0          # acknowledgements and errors
+SPEECH_PRIORITY_NORMAL = 1        # command confirmations
+SPEECH_PRIORITY_LOW = 2           # greetings and other chatter
+SPEECH_DEFAULT_TTL = 10.0         # seconds a queued message stays worth saying
+SPEECH_RENDER_TIMEOUT = 10.0      # give up on a synthesis that never reports completion
+SPEECH_STREAM_MIN_CHARS = 120     # speak() streams longer multi-sentence text sentence by sentence
+SPEECH_STREAM_MAX_CHARS = 200     # flush a run-on sentence at a word boundary past this length
+
+# Speech playback and echo suppression
+PLAYBACK_CHUNK = 512              # frames written to the output device at a time
+
+# Earcons - short tones on an always-open output stream, mixed over speech
+EARCON_SAMPLE_RATE = 22050
+EARCON_CHUNK = 256            # frames per write; bounds how long a trigger waits (~12 ms)
+EARCON_VOLUME = 0.25          # fraction of full scale
+EARCONS = {                   # name -> notes as (frequency Hz, seconds)
+    "wake": [(880, 0.05), (1320, 0.09)],
+    "error": [(196, 0.09), (165, 0.16)],
+    "done": [(1568, 0.07)],
+}
+ECHO_REFERENCE_SECONDS = 5.0      # how much playback history the echo reference keeps
+ECHO_MAX_DELAY = 0.35             # speaker → microphone delay we allow for (seconds)
+ECHO_INITIAL_COUPLING = 0.5       # mic energy per unit of playback energy, learned at runtime
+ECHO_MARGIN = 2.0                 # barge-in needs this much more energy than the expected echo
+ECHO_ADAPT_RATE = 0.05
+ECHO_MAX_COUPLING = 2.0           # learned coupling never goes above this
+ECHO_ONSET_GAP = 0.5              # playback after this much silence starts a new onset window
+ECHO_ONSET_WINDOW = 0.2           # too soon after playback starts for the user to be answering it
+
+# Background noise floor tracking (replaces one-shot calibration)
+NOISE_FLOOR_RISE_SECONDS = 10.0   # time constant for following louder ambience (e.g. AC switching on)
+NOISE_FLOOR_FALL_SECONDS = 0.5    # time constant for following quieter ambience
+NOISE_THRESHOLD_RATIO = 2.5       # speech threshold = noise floor * ratio
+NOISE_THRESHOLD_MIN = 50          # never let the threshold drop below this
+NOISE_PUBLISH_INTERVAL = 0.25     # seconds between updates pushed to app state
+AUDIO_LEVEL_HISTORY = 2400        # samples kept for plotting (10 minutes at 4 Hz)
+
+# Voice activity detection / endpointing
+VAD_MIN_SPEECH_SECONDS = 0.25   # shorter bursts are treated as noise and never recognized
+VAD_PADDING_SECONDS = 0.3       # audio kept on both sides of detected speech
+VAD_MAX_ZERO_CROSSING_RATE = 0.3  # hiss-like frames above this need twice the energy to count
+
+# Speech recognition backend: "google" (cloud), "sphinx" / "vosk" (offline) or "fake" (tests)
+RECOGNIZER_BACKEND = os.environ.get("PIXEL_RECOGNIZER", "google")
+VOSK_MODEL_PATH = os.environ.get("PIXEL_VOSK_MODEL", "model")
+
+# Recognition deadlines and hedging
+RECOGNITION_DEADLINE = 6.0      # seconds an utterance may take before we give up on it
+HEDGE_PERCENTILE = 95           # fire a hedged request once the first is slower than this percentile
+HEDGE_MIN_DELAY = 0.8           # ...but never earlier than this (seconds)
+HEDGE_MIN_SAMPLES = 10          # until we have this many latencies, hedge at HEDGE_MIN_DELAY * 2
+HEDGE_FALLBACK_BACKEND = os.environ.get("PIXEL_RECOGNIZER_FALLBACK", "")  # "" = hedge with the primary backend
+RECOGNITION_WORKERS = 4         # utterances recognized concurrently by the pipeline
+
+# Upload preparation for cloud recognition
+UPLOAD_SAMPLE_RATE = 16000      # Google's recommended rate; capture is usually 44.1/48 kHz
+UPLOAD_PADDING_SECONDS = 0.1    # silence kept around speech after trimming
+UPLOAD_TRIM_FRAME_MS = 10
+
+# Shared capture stream
+CAPTURE_CHUNK_SIZE = 1024       # samples per PCM chunk read from the device
+CAPTURE_BUFFER_SECONDS = 30     # how much recent audio the ring buffer keeps
+
+# Command actions run off the listener thread
+ACTION_WORKERS = 2              # actions running at once
+ACTION_QUEUE_LIMIT = 4          # actions waiting for a worker before new ones are refused
+ACTION_TIMEOUT = 10.0           # default seconds before an action is reported as timed out
+ACTION_QUEUE_TIMEOUT = 5.0      # seconds an action may wait for a worker before it is dropped as timed out
+
+# Event loop and UI bridge
+SHUTDOWN_TIMEOUT = 3.0          # quitting never takes longer than this
+UI_BRIDGE_INTERVAL_MS = 16      # how often Tk picks up calls from the event loop
+UI_FRAME_MS = 16                # pet indicator refresh (about 60 fps)
+UI_EVENT_LIMIT = 256            # pending UI events kept; the oldest are dropped beyond this
+UI_EVENTS_PER_FRAME = 64        # most events handled in one frame - the rest wait a frame
+UI_ERROR_FLASH_MS = 1200        # how long the error indicator stays up
+
+# Startup benchmark (--startup-benchmark)
+STARTUP_BENCHMARK_TOP = 15      # top-level imports listed per mode
+
+# Slot values for command patterns - the patterns themselves, and slots only
+# one plugin uses, are declared by the plugins in commands/__init__.py
+INTENT_SLOTS = {"site": COMMON_SITES}
+
+
+# THREADING-SAFE TTS MANAGER
+
+
+def read_wav(path):
+    """Return (pcm, sample_rate, sample_width, channels) for a WAV file"""
+    with wave.open(path, "rb") as wav:
+        return wav.readframes(wav.getnframes()), wav.getframerate(), wav.getsampwidth(), wav.getnchannels()
+
+
+class EchoReference:
+    """Timeline of what the speakers just played (energy per playback chunk)"""
+    
+    def __init__(self, seconds=ECHO_REFERENCE_SECONDS):
+        self.seconds = seconds
+        self.chunks = collections.deque()
+        self.onsets = collections.deque()  # when playback started after silence
+        self.lock = threading.Lock()
+    
+    def add(self, played_at, energy):
+        with self.lock:
+            if not self.chunks or played_at - self.chunks[-1][0] > ECHO_ONSET_GAP:
+                self.onsets.append(played_at)
+            self.chunks.append((played_at, energy))
+            while self.chunks and self.chunks[0][0] < played_at - self.seconds:
+                self.chunks.popleft()
+            while len(self.onsets) > 1 and self.onsets[1] < played_at - self.seconds:
+                self.onsets.popleft()
+    
+    def in_onset(self, at):
+        """True if at is within ECHO_ONSET_WINDOW of playback starting"""
+        with self.lock:
+            return any(onset <= at <= onset + ECHO_ONSET_WINDOW for onset in self.onsets)
+    
+    def peak(self, start, end):
+        """Loudest playback energy between two monotonic timestamps"""
+        with self.lock:
+            return max((energy for played_at, energy in self.chunks if start <= played_at <= end), default=0)
+
+
+class AudioPlayer:
+    """Chunked PCM playback through PyAudio that can be cut off mid-utterance"""
+    
+    def __init__(self, reference):
+        self.reference = reference
+        self.pyaudio_module = None
+        self.audio = None
+        self.stop_event = threading.Event()
+        self.idle = threading.Event()
+        self.idle.set()
+        self.silenced_at = None
+    
+    def play(self, pcm, sample_rate, sample_width, channels=1, on_start=None, cancelled=None):
+        """Play PCM, blocking until finished or stopped; returns True if it completed
+        
+        cancelled() is checked alongside the stop event, so a stop that landed
+        before this call (and was cleared by it) still takes effect.
+        """
+        if self.audio is None:
+            self.pyaudio_module = sr.Microphone.get_pyaudio()
+            self.audio = self.pyaudio_module.PyAudio()
+        
+        stream = self.audio.open(
+            format=self.audio.get_format_from_width(sample_width), channels=channels,
+            rate=sample_rate, output=True, frames_per_buffer=PLAYBACK_CHUNK,
+        )
+        frame_bytes = sample_width * channels
+        step = PLAYBACK_CHUNK * frame_bytes
+        self.stop_event.clear()
+        self.idle.clear()
+        completed = True
+        if on_start:
+            on_start()
+        try:
+            for offset in range(0, len(pcm), step):
+                if self.stop_event.is_set() or (cancelled and cancelled()):
+                    completed = False
+                    break
+                chunk = pcm[offset:offset + step]
+                mono = audioop.tomono(chunk, sample_width, 0.5, 0.5) if channels == 2 else chunk
+                self.reference.add(time.monotonic(), audioop.rms(mono, sample_width))
+                stream.write(chunk)
+        finally:
+            if completed:
+                stream.stop_stream()   # let the device buffer drain
+            else:
+                stream.abort_stream()  # drop the device buffer - silence now
+            stream.close()
+            self.silenced_at = time.monotonic()
+            self.idle.set()
+        return completed
+    
+    def stop(self):
+        """Cut playback off; returns the monotonic time the device went silent"""
+        self.stop_event.set()
+        self.idle.wait(timeout=1.0)
+        return self.silenced_at
+    
+    def is_playing(self):
+        return not self.idle.is_set()
+
+
+def synthesize_earcon(notes, sample_rate=EARCON_SAMPLE_RATE, volume=EARCON_VOLUME):
+    """16-bit mono PCM for a sequence of (frequency, seconds) notes with soft edges"""
+    samples = array.array("h")
+    attack = int(sample_rate * 0.004)
+    for frequency, seconds in notes:
+        count = int(sample_rate * seconds)
+        step = 2 * math.pi * frequency / sample_rate
+        for i in range(count):
+            envelope = min(1.0, i / attack) * math.exp(-4.0 * i / count) * min(1.0, (count - i) / attack)
+            samples.append(int(32767 * volume * envelope * math.sin(step * i)))
+    return samples.tobytes()
+
+
+class EarconPlayer:
+    """Always-open output stream that mixes short in-memory earcons
+    
+    The stream is opened once and fed silence between sounds, so a trigger
+    only waits for the current EARCON_CHUNK write - no device setup, no
+    speech queue. It is a second stream, so it plays over TTS.
+    """
+    
+    def __init__(self, reference, earcons=EARCONS):
+        self.reference = reference
+        self.sounds = {name: synthesize_earcon(notes) for name, notes in earcons.items()}
+        self.voices = []  # [pcm, offset, requested_at] currently sounding
+        self.lock = threading.Lock()
+        self.latency = LatencyTracker()  # play() to the first chunk handed to the device
+        self.shutdown_event = threading.Event()
+        self.thread = threading.Thread(target=self._output_loop, daemon=True)
+        self.thread.start()
+    
+    def play(self, name):
+        """Start an earcon without blocking; unknown names are ignored"""
+        pcm = self.sounds.get(name)
+        if pcm:
+            with self.lock:
+                self.voices.append([pcm, 0, time.monotonic()])
+    
+    def _next_chunk(self, step):
+        """Mix whatever is sounding into one chunk; returns (chunk, first-chunk request times)"""
+        chunk = bytes(step)
+        started = []
+        with self.lock:
+            for voice in self.voices:
+                pcm, offset, requested_at = voice
+                piece = pcm[offset:offset + step]
+                chunk = audioop.add(chunk, piece + bytes(step - len(piece)), 2)
+                if offset == 0:
+                    started.append(requested_at)
+                voice[1] = offset + step
+            self.voices = [voice for voice in self.voices if voice[1] < len(voice[0])]
+        return chunk, started
+    
+    def _output_loop(self):
+        step = EARCON_CHUNK * 2
+        while not self.shutdown_event.is_set():
+            try:
+                audio = sr.Microphone.get_pyaudio().PyAudio()
+                stream = audio.open(format=audio.get_format_from_width(2), channels=1,
+                                    rate=EARCON_SAMPLE_RATE, output=True, frames_per_buffer=EARCON_CHUNK)
+            except Exception as e:
+                print(f"  Earcon output unavailable: {e}")
+                return
+            
+            try:
+                while not self.shutdown_event.is_set():
+                    chunk, started = self._next_chunk(step)
+                    now = time.monotonic()
+                    for requested_at in started:
+                        self.latency.record(now - requested_at)
+                    if started or self.voices:
+                        self.reference.add(now, audioop.rms(chunk, 2))
+                    stream.write(chunk)  # blocks for about one chunk - paces the loop
+            except Exception as e:
+                print(f"  Earcon output error: {e} - reopening")
+                time.sleep(0.5)
+            finally:
+                stream.close()
+                audio.terminate()
+    
+    def shutdown(self):
+        self.shutdown_event.set()
+        self.thread.join(timeout=1)
+
+
+class SpeechHandle:
+    """Returned by speak(): futures that resolve when the utterance starts and ends
+    
+    started resolves with the monotonic time audio began (it is cancelled if
+    the message never plays); done resolves with the outcome: "spoken",
+    "interrupted", "cancelled", "expired", "superseded", "coalesced" or "error".
+    """
+    
+    def __init__(self):
+        self.started = Future()
+        self.done = Future()
+    
+    def wait_started(self, timeout=None):
+        """True once audio has started, False if it never will (or timeout)"""
+        try:
+            self.started.result(timeout)
+            return True
+        except Exception:
+            return False
+    
+    def wait(self, timeout=None):
+        """Block until the utterance is over; returns the outcome or None on timeout"""
+        try:
+            return self.done.result(timeout)
+        except Exception:
+            return None
+
+
+class SpeechItem:
+    """One queued utterance"""
+    
+    _sequence = itertools.count()
+    
+    def __init__(self, text, priority=SPEECH_PRIORITY_NORMAL, ttl=SPEECH_DEFAULT_TTL, key=None):
+        self.text = text
+        self.priority = priority
+        self.key = key  # messages with the same key supersede each other
+        self.seq = next(SpeechItem._sequence)
+        self.enqueued_at = time.monotonic()
+        self.expires_at = self.enqueued_at + ttl if ttl else None
+        self.cancelled = False
+        self.handle = SpeechHandle()
+        self.stream = None  # SpeechStream this sentence belongs to
+        self.part = 0       # position within the stream
+    
+    def mark_started(self):
+        if not self.handle.started.done():
+            self.handle.started.set_result(time.monotonic())
+    
+    def finish(self, outcome):
+        """Resolve the handle (first outcome wins)"""
+        self.handle.started.cancel()  # no-op if audio already started
+        if not self.handle.done.done():
+            self.handle.done.set_result(outcome)
+    
+    def __lt__(self, other):
+        return (self.priority, self.seq, self.part) < (other.priority, other.seq, other.part)
+    
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() > self.expires_at
+
+
+class SpeechStream:
+    """Returned by speak_stream(): behaves like a SpeechHandle for the whole response
+    
+    started resolves when the first sentence starts playing, done once the
+    last one has finished (with the first outcome that wasn't "spoken").
+    """
+    
+    def __init__(self, key=None):
+        self.key = key
+        self.seq = next(SpeechItem._sequence)  # keeps all sentences together in the queue
+        self.items = []
+        self.started = Future()
+        self.done = Future()
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+    
+    def add(self, item):
+        item.stream = self
+        item.seq, item.part = self.seq, len(self.items)
+        with self.lock:
+            self.items.append(item)
+        if item.part == 0:
+            item.handle.started.add_done_callback(self._first_started)
+        item.handle.done.add_done_callback(self._item_done)
+    
+    def _first_started(self, future):
+        if future.cancelled():
+            self.started.cancel()
+        elif not self.started.done():
+            self.started.set_result(future.result())
+    
+    def _item_done(self, future):
+        if future.result() != "spoken":
+            self.stop()
+    
+    def stop(self):
+        """Stop taking sentences and drop the ones still queued"""
+        self.stopped.set()
+        with self.lock:
+            for item in self.items:
+                if not item.handle.started.done():
+                    item.cancelled = True
+    
+    def close(self):
+        """No more sentences are coming; done resolves once the queued ones are handled"""
+        with self.lock:
+            items = list(self.items)
+        if not items:
+            self.started.cancel()
+            self.done.set_result("cancelled")
+            return
+        
+        def resolve(_):
+            with self.lock:
+                if self.done.done() or not all(item.handle.done.done() for item in items):
+                    return
+                outcomes = [item.handle.done.result() for item in items]
+                self.done.set_result(next((o for o in outcomes if o != "spoken"), "spoken"))
+        for item in items:
+            item.handle.done.add_done_callback(resolve)
+    
+    wait_started = SpeechHandle.wait_started
+    wait = SpeechHandle.wait
+
+
+def split_sentences(chunks):
+    """Yield whole sentences from an iterable of text chunks as soon as each is complete"""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            match = re.search(r"[.!?]+\s+", buffer)
+            if match:
+                end = match.end()
+            elif len(buffer) > SPEECH_STREAM_MAX_CHARS and " " in buffer[:SPEECH_STREAM_MAX_CHARS]:
+                end = buffer.rindex(" ", 0, SPEECH_STREAM_MAX_CHARS) + 1
+            else:
+                break
+            sentence, buffer = buffer[:end].strip(), buffer[end:]
+            if sentence:
+                yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+class SpeechQueue:
+    """Priority queue of utterances with expiry, coalescing and cancellation"""
+    
+    def __init__(self):
+        self.heap = []
+        self.condition = threading.Condition()
+        self.closed = False
+        self.stats = collections.Counter()
+    
+    def put(self, item):
+        """Queue item; drops queued duplicates and messages it supersedes"""
+        with self.condition:
+            if self.closed:
+                item.finish("cancelled")  # shutting down - nobody would ever speak it
+                return
+            kept = []
+            for queued in self.heap:
+                if item.stream is not None and queued.stream is item.stream:
+                    kept.append(queued)  # sentences of one stream never replace each other
+                elif item.key is not None and queued.key == item.key:
+                    self.stats["superseded"] += 1
+                    queued.finish("superseded")
+                elif queued.text == item.text and queued.stream is None and item.stream is None:
+                    # never streamed sentences: finishing one early would stop the whole response
+                    self.stats["duplicates"] += 1
+                    item.priority = min(item.priority, queued.priority)
+                    queued.finish("coalesced")
+                else:
+                    kept.append(queued)
+            heapq.heapify(kept)
+            heapq.heappush(kept, item)
+            self.heap = kept
+            self.stats["queued"] += 1
+            self.stats["max_depth"] = max(self.stats["max_depth"], len(kept))
+            self.condition.notify()
+    
+    def get(self, timeout=None):
+        """Next live item, or None on timeout / close"""
+        with self.condition:
+            while True:
+                if not self.condition.wait_for(lambda: self.heap or self.closed, timeout):
+                    return None
+                if self.closed:
+                    return None
+                item = heapq.heappop(self.heap)
+                if item.cancelled:
+                    self.stats["cancelled"] += 1
+                    item.finish("cancelled")
+                    continue
+                if item.expired():
+                    self.stats["expired"] += 1
+                    item.finish("expired")
+                    continue
+                return item
+    
+    def cancel(self, key=None):
+        """Drop queued items (all, or only those with key); returns how many"""
+        with self.condition:
+            dropped = [item for item in self.heap if key is None or item.key == key]
+            self.heap = [item for item in self.heap if not (key is None or item.key == key)]
+            heapq.heapify(self.heap)
+            for item in dropped:
+                item.cancelled = True
+                item.finish("cancelled")
+            self.stats["cancelled"] += len(dropped)
+            return len(dropped)
+    
+    def depth(self):
+        with self.condition:
+            return len(self.heap)
+    
+    def close(self):
+        with self.condition:
+            self.closed = True
+            for item in self.heap:
+                item.finish("cancelled")
+            self.heap = []
+            self.condition.notify_all()
+
+
+class PhraseCache:
+    """Disk-backed cache of pre-synthesized audio for fixed phrases
+    
+    Files are keyed by a hash of the voice settings and the text, and a
+    manifest records the settings they were rendered with; when the voice,
+    rate or volume changes the whole cache is thrown away and rebuilt.
+    """
+    
+    def __init__(self, directory, phrases=CACHED_PHRASES):
+        self.directory = directory
+        self.phrases = set(phrases)
+        self.fingerprint = None
+        self.audio = {}  # text -> (pcm, rate, width, channels), all in memory
+    
+    def open(self, fingerprint):
+        """Load cached phrases for these voice settings, invalidating stale ones"""
+        self.fingerprint = fingerprint
+        manifest_path = os.path.join(self.directory, "manifest.json")
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        
+        if manifest.get("fingerprint") != fingerprint:
+            if manifest:
+                print("  Voice settings changed - rebuilding phrase cache")
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.makedirs(self.directory, exist_ok=True)
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": fingerprint}, f)
+        
+        for leftover in glob.glob(os.path.join(self.directory, PHRASE_RENDER_PREFIX + "*")):
+            os.remove(leftover)  # render interrupted by a crash
+        
+        for text in self.phrases:
+            path = self.path_for(text)
+            if os.path.exists(path):
+                try:
+                    self.audio[text] = read_wav(path)
+                except Exception:
+                    os.remove(path)  # half-written file, render it again
+        print(f"✓ Phrase cache: {len(self.audio)}/{len(self.phrases)} phrases ready")
+    
+    def path_for(self, text):
+        digest = hashlib.sha1(f"{self.fingerprint}|{text}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{digest}.wav")
+    
+    def get(self, text):
+        """Cached audio or None"""
+        return self.audio.get(text)
+    
+    def wants(self, text):
+        return self.fingerprint is not None and text in self.phrases and text not in self.audio
+    
+    def missing(self):
+        return [text for text in self.phrases if text not in self.audio]
+    
+    def store(self, text, audio):
+        self.audio[text] = audio
+
+
+def number_words(n):
+    """Spoken form of 0-99 using only TEMPLATE_FRAGMENTS words"""
+    if n < 20:
+        return NUMBER_WORDS[n]
+    tens, units = divmod(n, 10)
+    return TENS_WORDS[tens - 2] + (f" {NUMBER_WORDS[units]}" if units else "")
+
+
+def time_words(moment=None):
+    """'THE TIME IS THREE OH SEVEN PM' for a struct_time (default now)"""
+    moment = moment or time.localtime()
+    hour = moment.tm_hour % 12 or 12
+    minute = moment.tm_min
+    if minute == 0:
+        minutes = "O'CLOCK"
+    elif minute < 10:
+        minutes = f"OH {number_words(minute)}"
+    else:
+        minutes = number_words(minute)
+    return f"THE TIME IS {number_words(hour)} {minutes} {'AM' if moment.tm_hour < 12 else 'PM'}"
+
+
+class SpeechTemplates:
+    """Concatenative synthesis from pre-rendered fragments in the phrase cache
+    
+    Text made up entirely of known fragments is stitched into one buffer:
+    each fragment is trimmed to its voiced part, faded in and out over a few
+    milliseconds and joined with a short gap, so there is no synthesis at all.
+    """
+    
+    def __init__(self, cache, fragments=TEMPLATE_FRAGMENTS):
+        self.cache = cache
+        self.fragments = set(fragments)
+        self.longest = max(len(fragment.split()) for fragment in fragments)
+        self.prepared = {}  # fragment -> trimmed and faded pcm
+    
+    def split(self, text):
+        """Greedy longest-match of text onto fragments, None if any word is unknown"""
+        words = text.split()
+        pieces = []
+        i = 0
+        while i < len(words):
+            for size in range(min(self.longest, len(words) - i), 0, -1):
+                candidate = " ".join(words[i:i + size])
+                if candidate in self.fragments:
+                    pieces.append(candidate)
+                    i += size
+                    break
+            else:
+                return None
+        return pieces
+    
+    def _prepare(self, pcm, rate, width, channels):
+        """Trim silence and ramp both edges to zero"""
+        frame = width * channels
+        step = max(1, int(rate * 0.005)) * frame  # 5 ms analysis frames
+        levels = [audioop.rms(pcm[i:i + step], width) for i in range(0, len(pcm), step)]
+        peak = max(levels, default=0)
+        voiced = [i for i, level in enumerate(levels) if level > peak * TEMPLATE_TRIM_RATIO]
+        if voiced:
+            pcm = pcm[voiced[0] * step:(voiced[-1] + 1) * step]
+        
+        fade = min(int(rate * TEMPLATE_FADE_SECONDS), len(pcm) // frame // 2)
+        steps = 8
+        block = max(1, fade // steps) * frame
+        head, tail = bytearray(), bytearray()
+        for k in range(min(steps, fade)):
+            gain = k / steps
+            head += audioop.mul(pcm[k * block:(k + 1) * block], width, gain)
+            tail[:0] = audioop.mul(pcm[len(pcm) - (k + 1) * block:len(pcm) - k * block], width, gain)
+        body = pcm[len(head):len(pcm) - len(tail)]
+        return bytes(head) + body + bytes(tail)
+    
+    def compose(self, text):
+        """(pcm, rate, width, channels) for text, or None when it can't be stitched"""
+        pieces = self.split(text)
+        if not pieces or len(pieces) < 2:
+            return None
+        audio = [self.cache.audio.get(piece) for piece in pieces]
+        if None in audio or len({a[1:] for a in audio}) != 1:
+            return None  # not rendered yet, or fragments in different formats
+        
+        rate, width, channels = audio[0][1:]
+        gap = b"\0" * (int(rate * TEMPLATE_WORD_GAP) * width * channels)
+        parts = []
+        for piece, (pcm, *_) in zip(pieces, audio):
+            if piece not in self.prepared:
+                self.prepared[piece] = self._prepare(pcm, rate, width, channels)
+            parts.append(self.prepared[piece])
+        return gap.join(parts), rate, width, channels
+
+
+class TTSManager:
+    """Thread-safe text-to-speech manager using a priority queue
+    
+    One pyttsx3 engine runs a persistent external loop on the worker thread
+    and renders each message to a temporary WAV file; AudioPlayer plays it,
+    so playback can be interrupted at any point and the audio we send to the
+    speakers is known (the echo reference for barge-in). Fixed phrases come
+    pre-rendered from the PhraseCache and templated ones (the time) are
+    stitched from cached fragments, so both skip synthesis entirely.
+    """
+    
+    def __init__(self, cache_dir=PHRASE_CACHE_DIR):
+        self.speech_queue = SpeechQueue()
+        self.interrupted_before = 0  # items with a lower seq were cut off by interrupt()
+        self.cache = PhraseCache(cache_dir, CACHED_PHRASES + TEMPLATE_FRAGMENTS)
+        self.templates = SpeechTemplates(self.cache)
+        self.first_audio = {"cached": LatencyTracker(), "template": LatencyTracker(), "live": LatencyTracker()}
+        self.first_word = LatencyTracker()  # speak_stream() call to first audio
+        self.on_speaking = None  # called with True / False as audio starts and stops
+        self.speaking = False
+        self.shutdown_event = threading.Event()
+        self.echo_reference = EchoReference()
+        self.player = AudioPlayer(self.echo_reference)
+        self.earcons = EarconPlayer(self.echo_reference)
+        self.rendered = threading.Event()
+        self.worker_thread = threading.Thread(target=self._tts_worker, daemon=True)
+        self.worker_thread.start()
+        print("✓ TTS Manager initialized")
+    
+    def _render(self, engine, text, path=None):
+        """Synthesize text to (pcm, rate, width, channels) via a WAV file
+        
+        Always renders into a temporary file. With path, that file replaces
+        path only once synthesis succeeded, so a timeout or crash can't leave
+        a truncated WAV in the cache.
+        """
+        fd, temp_path = tempfile.mkstemp(prefix=PHRASE_RENDER_PREFIX, suffix=".wav",
+                                         dir=os.path.dirname(path) if path else None)
+        os.close(fd)
+        try:
+            self.rendered.clear()
+            engine.save_to_file(text, temp_path)
+            # Pump the engine's loop only while this synthesis is in progress
+            deadline = time.monotonic() + SPEECH_RENDER_TIMEOUT
+            while not self.rendered.is_set():
+                if time.monotonic() > deadline:
+                    raise RuntimeError("speech synthesis timed out")
+                engine.iterate()
+                self.rendered.wait(0.01)
+            audio = read_wav(temp_path)
+            if path is not None:
+                os.replace(temp_path, path)
+            return audio
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def _synthesize(self, engine, text):
+        """Audio for text and where it came from: cached, template or live
+        
+        Fixed phrases rendered live are written to the cache on the way.
+        """
+        audio = self.cache.get(text)
+        if audio is not None:
+            return audio, "cached"
+        audio = self.templates.compose(text)
+        if audio is not None:
+            return audio, "template"
+        if self.cache.wants(text):
+            audio = self._render(engine, text, self.cache.path_for(text))
+            self.cache.store(text, audio)
+            return audio, "live"
+        return self._render(engine, text), "live"
+    
+    def _prerender(self, engine, text):
+        """Fill one missing cache entry while nothing else needs the engine"""
+        try:
+            self.cache.store(text, self._render(engine, text, self.cache.path_for(text)))
+        except Exception as e:
+            print(f"  Phrase cache error for '{text}': {e}")
+    
+    def _tts_worker(self):
+        """Worker thread that processes TTS requests"""
+        engine = pyttsx3.init()  # One engine per thread - thread safe!
+        engine.connect("finished-utterance", lambda name, completed: self.rendered.set())
+        engine.startLoop(False)  # persistent loop instead of runAndWait per message
+        
+        try:
+            fingerprint = "|".join(str(engine.getProperty(name)) for name in ("voice", "rate", "volume"))
+            self.cache.open(fingerprint)
+        except Exception as e:
+            self.cache.fingerprint = None  # live rendering only
+            print(f"  Phrase cache unavailable: {e}")
+        to_prerender = self.cache.missing() if self.cache.fingerprint else []
+        
+        while True:
+            # Blocks until there is something to say; while cache entries are
+            # missing, idle time is used to render them one at a time
+            item = self.speech_queue.get(timeout=0 if to_prerender else None)
+            if item is None:
+                if self.speech_queue.closed:
+                    break
+                text = to_prerender.pop()
+                if self.cache.wants(text):
+                    self._prerender(engine, text)
+                continue
+            
+            outcome = "error"
+            dequeued_at = time.monotonic()
+            
+            def stale(item=item):
+                return item.cancelled or item.seq < self.interrupted_before
+            try:
+                audio, source = self._synthesize(engine, item.text)
+                first_audio = self.first_audio[source]
+                
+                def on_start(item=item, first_audio=first_audio):
+                    first_audio.record(time.monotonic() - dequeued_at)
+                    item.mark_started()
+                    self._set_speaking(True)
+                
+                # Rendering takes time - re-check before anything reaches the speakers
+                if stale():
+                    outcome = "cancelled"
+                elif item.expired():
+                    self.speech_queue.stats["expired"] += 1
+                    outcome = "expired"
+                elif self.player.play(*audio, on_start=on_start, cancelled=stale):
+                    self.speech_queue.stats["spoken"] += 1
+                    outcome = "spoken"
+                else:
+                    outcome = "interrupted"
+            except Exception as e:
+                print(f"  TTS error: {e}")
+            finally:
+                self._set_speaking(False)
+                item.finish(outcome)
+        
+        engine.endLoop()
+    
+    def _set_speaking(self, speaking):
+        if speaking != self.speaking:
+            self.speaking = speaking
+            if self.on_speaking:
+                self.on_speaking(speaking)
+    
+    def speak(self, text, priority=SPEECH_PRIORITY_NORMAL, ttl=SPEECH_DEFAULT_TTL, key=None):
+        """Queue text for speaking, returns a SpeechHandle
+        
+        Messages expire after ttl seconds in the queue. A message with the
+        same key as a queued one replaces it; identical text is coalesced.
+        Long multi-sentence text is streamed (see speak_stream).
+        """
+        if len(text) > SPEECH_STREAM_MIN_CHARS and re.search(r"[.!?]\s", text):
+            return self.speak_stream([text], priority, ttl, key)
+        item = SpeechItem(text, priority, ttl, key)
+        if self.shutdown_event.is_set():
+            item.finish("cancelled")
+        else:
+            self.speech_queue.put(item)
+        return item.handle
+    
+    def speak_stream(self, chunks, priority=SPEECH_PRIORITY_NORMAL, ttl=SPEECH_DEFAULT_TTL, key=None):
+        """Speak an iterable of text chunks sentence by sentence, returns a SpeechStream
+        
+        chunks is consumed on a separate thread, so the first sentence is
+        spoken while later ones are still being produced. ttl applies to the
+        first sentence; the rest follow it without expiring.
+        """
+        stream = SpeechStream(key)
+        requested_at = time.monotonic()
+        stream.started.add_done_callback(
+            lambda f: f.cancelled() or self.first_word.record(f.result() - requested_at))
+        
+        def produce():
+            try:
+                for sentence in split_sentences(chunks):
+                    if stream.stopped.is_set() or self.shutdown_event.is_set():
+                        break
+                    item = SpeechItem(sentence, priority, None if stream.items else ttl, key)
+                    stream.add(item)
+                    self.speech_queue.put(item)
+            except Exception as e:
+                print(f"  Speech stream error: {e}")
+            finally:
+                stream.close()
+        
+        threading.Thread(target=produce, daemon=True).start()
+        return stream
+    
+    def play_earcon(self, name):
+        """Immediate feedback tone, mixed over any speech in progress"""
+        self.earcons.play(name)
+    
+    def is_speaking(self):
+        """True while audio is coming out of the speakers"""
+        return self.player.is_playing()
+    
+    def cancel(self, key=None):
+        """Drop queued messages (all, or those with key) without cutting off the current one"""
+        return self.speech_queue.cancel(key)
+    
+    def interrupt(self):
+        """Drop everything queued and stop the current utterance; returns when silent"""
+        # Everything created so far is cut off - including an item the worker
+        # has just taken from the queue but not started playing yet
+        self.interrupted_before = next(SpeechItem._sequence)
+        self.cancel()
+        self.speech_queue.stats["interrupted"] += 1
+        return self.player.stop()
+    
+    def queue_stats(self):
+        """Current depth plus spoken / dropped counters"""
+        stats = dict(self.speech_queue.stats)
+        stats["depth"] = self.speech_queue.depth()
+        return stats
+    
+    def report(self):
+        stats = self.queue_stats()
+        counts = {source: tracker.count for source, tracker in self.first_audio.items()}
+        hit_rate = (counts["cached"] + counts["template"]) / max(1, sum(counts.values()))
+        return (f"Speech queue: depth {stats['depth']} (max {stats.get('max_depth', 0)}), "
+                f"{stats.get('spoken', 0)} spoken, {stats.get('expired', 0)} expired, "
+                f"{stats.get('superseded', 0)} superseded, {stats.get('duplicates', 0)} duplicates, "
+                f"{stats.get('cancelled', 0)} cancelled, {stats.get('interrupted', 0)} interrupts\n"
+                f"Phrase cache hit rate: {hit_rate:.0%} (templates included)\n"
+                + "\n".join(tracker.summary(f"Time to first audio ({source})")
+                             for source, tracker in self.first_audio.items())
+                + "\n" + self.first_word.summary("Time to first word (streamed)")
+                + "\n" + self.earcons.latency.summary("Earcon trigger latency"))
+    
+    def shutdown(self):
+        """Gracefully shutdown TTS worker"""
+        self.shutdown_event.set()
+        self.speech_queue.close()
+        self.player.stop()
+        self.earcons.shutdown()
+        self.worker_thread.join(timeout=2)
+        print(self.report())
+
+
+# SHARED AUDIO CAPTURE (ONE STREAM, MANY READERS)
+class AudioRingBuffer:
+    """Bounded ring buffer of PCM chunks addressed by absolute position"""
+    
+    def __init__(self, capacity):
+        self.chunks = collections.deque(maxlen=capacity)
+        self.stamps = collections.deque(maxlen=capacity)  # monotonic time each chunk arrived
+        self.next_position = 0  # absolute position of the next chunk to be written
+        self.closed = False
+        self.condition = threading.Condition()
+    
+    def append(self, chunk, captured_at=None):
+        """Store a chunk (oldest chunk falls off when full) and wake readers"""
+        with self.condition:
+            self.chunks.append(chunk)
+            self.stamps.append(time.monotonic() if captured_at is None else captured_at)
+            self.next_position += 1
+            self.condition.notify_all()
+    
+    def live_position(self):
+        """Position the next captured chunk will get"""
+        with self.condition:
+            return self.next_position
+    
+    def get(self, position):
+        """Block until the chunk at position exists, returns (position, chunk)
+        
+        If the reader fell behind and the chunk was overwritten, the oldest
+        chunk still available is returned instead. Returns (position, b"")
+        once the buffer is closed and fully drained.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: position < self.next_position or self.closed)
+            if position >= self.next_position:
+                return position, b""
+            oldest = self.next_position - len(self.chunks)
+            position = max(position, oldest)
+            return position, self.chunks[position - oldest]
+    
+    def time_of(self, position):
+        """Monotonic time the chunk at position arrived (nearest chunk still held if evicted)"""
+        with self.condition:
+            if not self.stamps:
+                return None
+            oldest = self.next_position - len(self.stamps)
+            return self.stamps[min(max(position - oldest, 0), len(self.stamps) - 1)]
+    
+    def close(self):
+        """Release all blocked readers"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class RingBufferReader:
+    """Independent read cursor into an AudioRingBuffer (file-like for speech_recognition)"""
+    
+    def __init__(self, ring, position=None):
+        self.ring = ring
+        self.position = ring.live_position() if position is None else position
+        self.overruns = 0
+    
+    def read(self, size=None):
+        """Return the next chunk, blocking until it has been captured"""
+        position, chunk = self.ring.get(self.position)
+        if position != self.position:
+            self.overruns += 1
+        if chunk:
+            self.position = position + 1
+        return chunk
+    
+    def close(self):
+        pass
+
+
+class RingBufferSource:
+    """speech_recognition audio source backed by a ring buffer reader (see voice_class)"""
+    
+    def __init__(self, capture, position=None):
+        self.SAMPLE_RATE = capture.sample_rate
+        self.SAMPLE_WIDTH = capture.sample_width
+        self.CHUNK = capture.chunk_size
+        self.capture = capture
+        self.stream = RingBufferReader(capture.ring, position)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+class AudioCaptureStream:
+    """Owns the single long-lived microphone stream and feeds the ring buffer"""
+    
+    def __init__(self, chunk_size=CAPTURE_CHUNK_SIZE, buffer_seconds=CAPTURE_BUFFER_SECONDS):
+        self.chunk_size = chunk_size
+        self.buffer_seconds = buffer_seconds
+        self.sample_rate = None
+        self.sample_width = None
+        self.ring = None
+        self.ready_event = threading.Event()
+        self.shutdown_event = threading.Event()
+        self.capture_thread = None
+    
+    def start(self):
+        """Open the microphone once and start the capture thread"""
+        if self.capture_thread:
+            return
+        self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.capture_thread.start()
+        self.ready_event.wait()
+        if self.ring is None:
+            raise RuntimeError("microphone stream could not be opened")
+    
+    def _capture_loop(self):
+        """Read chunks from the device for as long as the app runs"""
+        while not self.shutdown_event.is_set():
+            try:
+                with sr.Microphone(chunk_size=self.chunk_size) as mic:
+                    if mic.stream is None:
+                        raise RuntimeError("no input stream")
+                    if self.ring is None:
+                        self.sample_rate = mic.SAMPLE_RATE
+                        self.sample_width = mic.SAMPLE_WIDTH
+                        capacity = int(self.buffer_seconds * mic.SAMPLE_RATE / self.chunk_size)
+                        self.ring = AudioRingBuffer(max(capacity, 1))
+                        print(f"✓ Capture stream open ({mic.SAMPLE_RATE} Hz)")
+                    self.ready_event.set()
+                    
+                    while not self.shutdown_event.is_set():
+                        self.ring.append(mic.stream.read(self.chunk_size))
+            except Exception as e:
+                print(f"  Capture stream error: {e}")
+                if self.ring is None:
+                    break
+                # Device went away - retry instead of leaving listeners deaf
+                self.shutdown_event.wait(1.0)
+        
+        if self.ring is not None:
+            self.ring.close()
+        self.ready_event.set()
+    
+    def time_of(self, position):
+        """Monotonic time at which the chunk at position finished recording"""
+        return self.ring.time_of(position)
+    
+    def open_source(self, position=None):
+        """Create an audio source with its own cursor (default: live audio)"""
+        return voice_class(RingBufferSource, "AudioSource")(self, position)
+    
+    def shutdown(self):
+        """Stop capturing and release readers"""
+        self.shutdown_event.set()
+        if self.capture_thread:
+            self.capture_thread.join(timeout=2)
+        if self.ring is not None:
+            self.ring.close()
+
+
+# BACKGROUND NOISE FLOOR TRACKING
+class NoiseFloorTracker:
+    """Follows ambient noise on its own ring buffer cursor and updates the energy threshold
+    
+    Asymmetric exponential smoothing: the floor drops quickly when the room
+    gets quieter and rises slowly when it gets louder, three times slower
+    still while the audio is above threshold, so speech barely moves it but
+    a fan or air conditioner is absorbed within tens of seconds.
+    """
+    
+    def __init__(self, recognizer):
+        self.recognizer = recognizer  # energy_threshold is read by VAD, wake word and upload stages
+        self.noise_floor = None
+        self.on_update = None  # callback(noise_floor, energy_threshold)
+        self.shutdown_event = threading.Event()
+        self.tracker_thread = None
+    
+    def start(self, capture):
+        self.tracker_thread = threading.Thread(target=self._track, args=(capture,), daemon=True)
+        self.tracker_thread.start()
+    
+    def update(self, energy, seconds_per_chunk):
+        """Fold one chunk's energy into the floor, returns the new threshold"""
+        if self.noise_floor is None:
+            self.noise_floor = float(energy)
+        elif energy < self.noise_floor:
+            self.noise_floor += (energy - self.noise_floor) * min(1.0, seconds_per_chunk / NOISE_FLOOR_FALL_SECONDS)
+        else:
+            rise = NOISE_FLOOR_RISE_SECONDS
+            if energy > self.recognizer.energy_threshold:
+                rise *= 3
+            self.noise_floor += (energy - self.noise_floor) * min(1.0, seconds_per_chunk / rise)
+        
+        threshold = max(NOISE_THRESHOLD_MIN, self.noise_floor * NOISE_THRESHOLD_RATIO)
+        self.recognizer.energy_threshold = threshold
+        return threshold
+    
+    def _track(self, capture):
+        reader = RingBufferReader(capture.ring)
+        seconds_per_chunk = capture.chunk_size / capture.sample_rate
+        since_publish = 0.0
+        
+        while not self.shutdown_event.is_set():
+            chunk = reader.read()
+            if not chunk:
+                break
+            threshold = self.update(audioop.rms(chunk, capture.sample_width), seconds_per_chunk)
+            
+            since_publish += seconds_per_chunk
+            if since_publish >= NOISE_PUBLISH_INTERVAL and self.on_update:
+                since_publish = 0.0
+                self.on_update(self.noise_floor, threshold)
+    
+    def shutdown(self):
+        self.shutdown_event.set()
+
+
+# ECHO SUPPRESSION FOR BARGE-IN
+class EchoSuppressor:
+    """Decides whether loud microphone audio is just our own playback coming back
+    
+    Uses the TTS echo reference: the expected echo is the loudest recent
+    playback chunk (within ECHO_MAX_DELAY) times a learned speaker-to-mic
+    coupling. Only audio well above that counts as the user talking over us.
+    Loud audio right after playback starts is always learned from, so a
+    coupling far above the initial guess is still picked up.
+    """
+    
+    def __init__(self, reference):
+        self.reference = reference
+        self.coupling = ECHO_INITIAL_COUPLING
+        self.stats = collections.Counter()
+    
+    def is_echo(self, energy, threshold, captured_at):
+        """True if a chunk above threshold is only our playback; call for quiet chunks too, to learn"""
+        playback = self.reference.peak(captured_at - ECHO_MAX_DELAY, captured_at)
+        if not playback:
+            return False
+        
+        if energy > threshold and self.reference.in_onset(captured_at):
+            # Too early for the user to be answering us - anything this loud is our echo
+            self._learn(energy / playback)
+            self.stats["suppressed_chunks"] += 1
+            return True
+        
+        if energy > threshold + ECHO_MARGIN * self.coupling * playback:
+            # The user talking over us - learning from it would teach us to suppress them
+            self.stats["barge_in_chunks"] += 1
+            return False
+        
+        # Learn coupling only from audio we attribute to the speakers
+        self._learn(energy / playback)
+        if energy <= threshold:
+            return False
+        self.stats["suppressed_chunks"] += 1
+        return True
+    
+    def _learn(self, coupling):
+        self.coupling += (coupling - self.coupling) * ECHO_ADAPT_RATE
+        self.coupling = min(self.coupling, ECHO_MAX_COUPLING)
+    
+    def report(self):
+        return (f"Echo suppression: {self.stats['suppressed_chunks']} chunks suppressed, "
+                f"{self.stats['barge_in_chunks']} passed during playback, coupling {self.coupling:.2f}")
+
+
+# STREAMING VOICE ACTIVITY DETECTION
+SpeechSegment = collections.namedtuple("SpeechSegment", "audio start end start_position end_position")
+
+
+class VoiceActivityDetector:
+    """Streaming energy / zero-crossing VAD that cuts utterances out of the capture stream"""
+    
+    def __init__(self, recognizer):
+        self.recognizer = recognizer  # energy_threshold is maintained by NoiseFloorTracker
+        self.echo = None  # EchoSuppressor, set when TTS playback is wired up
+        self.stats = collections.Counter()
+        self.processing_time = 0.0
+        self.audio_seconds = 0.0
+    
+    def classify(self, chunk, sample_width):
+        """Return (is_speech, energy) for one chunk of PCM"""
+        energy = audioop.rms(chunk, sample_width)
+        threshold = self.recognizer.energy_threshold
+        if energy <= threshold:
+            return False, energy
+        zero_crossing_rate = audioop.cross(chunk, sample_width) / max(len(chunk) // sample_width, 1)
+        return zero_crossing_rate <= VAD_MAX_ZERO_CROSSING_RATE or energy > 2 * threshold, energy
+    
+    def _process(self, source, sample_width, seconds_per_chunk):
+        """Read one chunk and classify it, returns (chunk, is_speech)"""
+        reader = source.stream
+        chunk = reader.read()
+        if not chunk:
+            return chunk, False
+        start = time.perf_counter()
+        is_speech, energy = self.classify(chunk, sample_width)
+        if self.echo is not None:
+            captured_at = source.capture.time_of(reader.position - 1)
+            is_echo = self.echo.is_echo(energy, self.recognizer.energy_threshold, captured_at)
+            is_speech = is_speech and not is_echo
+        self.processing_time += time.perf_counter() - start
+        self.audio_seconds += seconds_per_chunk
+        return chunk, is_speech
+    
+    def next_segment(self, source, timeout=None, phrase_limit=None):
+        """Block until the next utterance, returns SpeechSegment or None on timeout
+        
+        timeout and phrase_limit are measured in audio seconds, like
+        speech_recognition's listen(). Bursts shorter than
+        VAD_MIN_SPEECH_SECONDS are dropped here, before any recognizer runs.
+        """
+        reader = source.stream
+        sample_width = source.SAMPLE_WIDTH
+        seconds_per_chunk = source.CHUNK / source.SAMPLE_RATE
+        padding_chunks = max(1, int(VAD_PADDING_SECONDS / seconds_per_chunk))
+        pause_chunks = int(math.ceil(self.recognizer.pause_threshold / seconds_per_chunk))
+        min_speech_chunks = max(1, int(math.ceil(VAD_MIN_SPEECH_SECONDS / seconds_per_chunk)))
+        phrase_chunks = int(math.ceil(phrase_limit / seconds_per_chunk)) if phrase_limit else None
+        waited = 0.0
+        
+        while True:
+            # Wait for speech onset, keeping a little pre-roll
+            preroll = collections.deque(maxlen=padding_chunks)
+            while True:
+                if timeout and waited > timeout:
+                    return None
+                chunk, is_speech = self._process(source, sample_width, seconds_per_chunk)
+                if not chunk:
+                    return None
+                waited += seconds_per_chunk
+                if is_speech:
+                    break
+                preroll.append(chunk)
+            
+            start_position = reader.position - 1
+            frames = list(preroll)
+            frames.append(chunk)
+            speech_chunks, silent_run, phrase_count = 1, 0, 1
+            
+            # Collect until the pause threshold or phrase limit
+            while not phrase_chunks or phrase_count < phrase_chunks:
+                chunk, is_speech = self._process(source, sample_width, seconds_per_chunk)
+                if not chunk:
+                    break
+                frames.append(chunk)
+                phrase_count += 1
+                if is_speech:
+                    speech_chunks += 1
+                    silent_run = 0
+                else:
+                    silent_run += 1
+                    if silent_run > pause_chunks:
+                        break
+            waited += (phrase_count - 1) * seconds_per_chunk
+            
+            if speech_chunks < min_speech_chunks:
+                self.stats["noise_discarded"] += 1
+                if not chunk:
+                    return None
+                continue
+            
+            # Keep only padding_chunks of trailing silence
+            trailing = max(silent_run - padding_chunks, 0)
+            if trailing:
+                del frames[-trailing:]
+            end_position = reader.position - silent_run
+            self.stats["segments"] += 1
+            return SpeechSegment(
+                audio=sr.AudioData(b"".join(frames), source.SAMPLE_RATE, sample_width),
+                start=start_position * seconds_per_chunk,
+                end=end_position * seconds_per_chunk,
+                start_position=start_position,
+                end_position=end_position,
+            )
+    
+    def report(self):
+        """Segments emitted, noise dropped and CPU cost per audio second"""
+        cost = self.processing_time / max(self.audio_seconds, 1e-9)
+        return (f"VAD: {self.stats['segments']} segments, {self.stats['noise_discarded']} noise bursts dropped, "
+                f"{cost * 1e6:.0f} us CPU per audio second over {self.audio_seconds:.0f}s")
+
+
+# LOCAL WAKE WORD DETECTOR
+WakeWordDecision = collections.namedtuple("WakeWordDecision", "fired score engine elapsed")
+
+
+class WakeWordDetector:
+    """CPU-only wake word stage that gates cloud recognition
+    
+    Needs pocketsphinx to actually spot the wake word. Without it only the
+    loudness / length check runs, which any sentence passes - gating is then
+    off and a warning says so at startup.
+    """
+    
+    def __init__(self, recognizer, wake_words=WAKE_WORDS, sensitivity=WAKE_WORD_SENSITIVITY):
+        self.recognizer = recognizer
+        self.sensitivity = min(max(sensitivity, 0.0), 1.0)
+        # Sphinx only needs the distinctive word, every wake phrase ends in it
+        self.keywords = sorted({phrase.split()[-1] for phrase in wake_words})
+        self.use_sphinx = importlib.util.find_spec("pocketsphinx") is not None
+        self.stats = collections.Counter()
+        if self.use_sphinx:
+            print(f"✓ Wake word detector initialized (pocketsphinx keyword spotting, sensitivity {self.sensitivity:.2f})")
+        else:
+            self._warn_gating_off("pocketsphinx is not installed")
+    
+    def _warn_gating_off(self, reason):
+        print(f"⚠  Wake word gating is OFF ({reason}): all speech goes to the cloud recognizer. "
+              f"pip install pocketsphinx to filter it locally.")
+    
+    def _voiced_ratio(self, audio):
+        """Fraction of short frames above the current energy threshold"""
+        raw = audio.get_raw_data()
+        frame_bytes = int(audio.sample_rate * WAKE_WORD_FRAME_MS / 1000) * audio.sample_width
+        frames = [raw[i:i + frame_bytes] for i in range(0, len(raw) - frame_bytes + 1, frame_bytes)]
+        if not frames:
+            return 0.0
+        threshold = self.recognizer.energy_threshold
+        voiced = sum(1 for frame in frames if audioop.rms(frame, audio.sample_width) > threshold)
+        return voiced / len(frames)
+    
+    def detect(self, audio, extra_keywords=()):
+        """Decide locally whether audio may contain a wake word (or one of extra_keywords)"""
+        start = time.perf_counter()
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        
+        # Stage 1: cheap acoustic gate (coughs, clicks, door slams)
+        min_voiced = 0.35 - 0.25 * self.sensitivity
+        score = self._voiced_ratio(audio)
+        fired = duration >= WAKE_WORD_MIN_SECONDS and score >= min_voiced
+        engine = "gate"
+        
+        # Stage 2: offline keyword spotting
+        if fired and self.use_sphinx:
+            engine = "sphinx"
+            try:
+                keywords = self.keywords + list(extra_keywords)
+                entries = [(keyword, self.sensitivity) for keyword in keywords]
+                hypothesis = self.recognizer.recognize_sphinx(audio, keyword_entries=entries)
+                fired = any(keyword in hypothesis for keyword in keywords)
+            except sr.UnknownValueError:
+                fired = False
+            except sr.RequestError as e:
+                self.use_sphinx = False
+                self._warn_gating_off(f"Sphinx failed: {e}")
+        
+        self.stats["clips"] += 1
+        self.stats["fired" if fired else "rejected"] += 1
+        return WakeWordDecision(fired, score, engine, time.perf_counter() - start)
+    
+    def record_outcome(self, decision, wake_word_heard):
+        """Feed back what the cloud recognizer heard after the stage fired"""
+        if decision.fired:
+            self.stats["true_accepts" if wake_word_heard else "false_accepts"] += 1
+    
+    def evaluate(self, samples):
+        """Measure false accept / false reject rates on labelled (audio, has_wake_word) pairs"""
+        counts = collections.Counter()
+        for audio, has_wake_word in samples:
+            fired = self.detect(audio).fired
+            counts["positives" if has_wake_word else "negatives"] += 1
+            if has_wake_word and not fired:
+                counts["false_rejects"] += 1
+            elif fired and not has_wake_word:
+                counts["false_accepts"] += 1
+        return {
+            "positives": counts["positives"],
+            "negatives": counts["negatives"],
+            "false_accept_rate": counts["false_accepts"] / max(counts["negatives"], 1),
+            "false_reject_rate": counts["false_rejects"] / max(counts["positives"], 1),
+        }
+    
+    def report(self):
+        """Runtime summary; false accepts are confirmed by the cloud transcript"""
+        fired = self.stats["fired"]
+        return (f"Wake word stage{'' if self.use_sphinx else ' (gating off)'}: "
+                f"{self.stats['clips']} clips, {fired} sent to cloud, "
+                f"{self.stats['rejected']} rejected locally, "
+                f"{self.stats['false_accepts']} false accepts "
+                f"({self.stats['false_accepts'] / max(fired, 1):.0%} of fired)")
+
+
+def load_wake_word_samples(directory):
+    """Load labelled clips from <directory>/positive/*.wav and <directory>/negative/*.wav"""
+    samples = []
+    recognizer = sr.Recognizer()
+    for label, has_wake_word in (("positive", True), ("negative", False)):
+        for path in sorted(glob.glob(os.path.join(directory, label, "*.wav"))):
+            with sr.AudioFile(path) as source:
+                samples.append((recognizer.record(source), has_wake_word))
+    return samples
+
+
+# SPEECH RECOGNITION BACKENDS
+RecognitionResult = collections.namedtuple("RecognitionResult", "text confidence backend latency audio_seconds")
+
+
+class RecognizerBackend:
+    """Base class for speech-to-text engines
+    
+    Subclasses implement transcribe(audio) -> (text, confidence) and raise
+    sr.UnknownValueError for no speech or sr.RequestError when the engine
+    itself fails.
+    """
+    name = "base"
+    uploads_flac = False  # True if the engine sends FLAC over the network
+    
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+    
+    def transcribe(self, audio):
+        raise NotImplementedError
+    
+    def recognize(self, audio):
+        """Transcribe and time one utterance"""
+        start = time.perf_counter()
+        text, confidence = self.transcribe(audio)
+        if not text:
+            raise sr.UnknownValueError()
+        audio_seconds = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        return RecognitionResult(text, confidence, self.name, time.perf_counter() - start, audio_seconds)
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API (network)"""
+    name = "google"
+    uploads_flac = True
+    
+    def transcribe(self, audio):
+        return self.recognizer.recognize_google(audio, with_confidence=True)
+
+
+class SphinxBackend(RecognizerBackend):
+    """CMU PocketSphinx, fully offline (pip install pocketsphinx)"""
+    name = "sphinx"
+    
+    def transcribe(self, audio):
+        return self.recognizer.recognize_sphinx(audio), None
+
+
+class VoskBackend(RecognizerBackend):
+    """Vosk/Kaldi, fully offline (pip install vosk + unpacked model)"""
+    name = "vosk"
+    
+    def __init__(self, recognizer, model_path=VOSK_MODEL_PATH):
+        super().__init__(recognizer)
+        self.model_path = model_path
+        self.model = None  # loaded once, on first use
+    
+    def transcribe(self, audio):
+        try:
+            from vosk import KaldiRecognizer, Model
+        except ImportError:
+            raise sr.RequestError("missing vosk module: pip install vosk")
+        if self.model is None:
+            if not os.path.isdir(self.model_path):
+                raise sr.RequestError(f"Vosk model not found at {self.model_path}")
+            self.model = Model(self.model_path)
+        
+        engine = KaldiRecognizer(self.model, 16000)
+        engine.AcceptWaveform(audio.get_raw_data(convert_rate=16000, convert_width=2))
+        result = json.loads(engine.FinalResult())
+        return result.get("text", ""), None
+
+
+class FakeBackend(RecognizerBackend):
+    """Deterministic recognizer for tests and benchmarks
+    
+    Returns scripted transcripts in order (cycling), or the transcript
+    registered for an exact clip via add(). latency is simulated.
+    """
+    name = "fake"
+    
+    def __init__(self, recognizer, transcripts=None, latency=0.0):
+        super().__init__(recognizer)
+        self.transcripts = list(transcripts) if transcripts else [WAKE_WORDS[0]]
+        self.by_audio = {}
+        self.latency = latency
+        self.calls = 0
+    
+    def add(self, audio, text):
+        self.by_audio[audio.frame_data] = text
+    
+    def transcribe(self, audio):
+        if self.latency:
+            time.sleep(self.latency)
+        text = self.by_audio.get(audio.frame_data)
+        if text is None:
+            text = self.transcripts[self.calls % len(self.transcripts)]
+        self.calls += 1
+        return text, 1.0
+
+
+RECOGNIZER_BACKENDS = {
+    backend.name: backend for backend in (GoogleBackend, SphinxBackend, VoskBackend, FakeBackend)
+}
+
+
+def create_recognizer_backend(name, recognizer):
+    """Instantiate a backend by config name"""
+    if name not in RECOGNIZER_BACKENDS:
+        raise ValueError(f"Unknown recognizer backend '{name}' (choose from {', '.join(RECOGNIZER_BACKENDS)})")
+    return RECOGNIZER_BACKENDS[name](recognizer)
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by reference length"""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / max(len(ref), 1)
+
+
+def compare_recognizer_backends(samples, backends):
+    """Run every backend on the same (audio, expected_text) pairs
+    
+    Returns {backend name: {"latency": mean seconds, "wer": mean word error rate, "failures": n}}
+    """
+    results = {}
+    for backend in backends:
+        latencies, errors, failures = [], [], 0
+        for audio, expected in samples:
+            start = time.perf_counter()
+            try:
+                text = backend.recognize(audio).text
+            except (sr.UnknownValueError, sr.RequestError):
+                text = ""
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+            errors.append(word_error_rate(expected, text))
+        results[backend.name] = {
+            "latency": sum(latencies) / max(len(latencies), 1),
+            "wer": sum(errors) / max(len(errors), 1),
+            "failures": failures,
+        }
+    return results
+
+
+def load_transcribed_samples(directory):
+    """Load <name>.wav clips with their expected text from <name>.txt"""
+    samples = []
+    recognizer = sr.Recognizer()
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        transcript_path = os.path.splitext(path)[0] + ".txt"
+        if not os.path.exists(transcript_path):
+            continue
+        with open(transcript_path, encoding="utf-8") as f:
+            expected = f.read().strip()
+        with sr.AudioFile(path) as source:
+            samples.append((recognizer.record(source), expected))
+    return samples
+
+
+# LATENCY TRACKING
+class LatencyTracker:
+    """Rolling window of latencies with percentile summaries"""
+    
+    def __init__(self, window=200):
+        self.samples = collections.deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.count = 0
+    
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+            self.count += 1
+    
+    def percentile(self, percent, default=None):
+        """Nearest-rank percentile of the current window"""
+        with self.lock:
+            if not self.samples:
+                return default
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))
+        return ordered[index]
+    
+    def summary(self, name):
+        if not self.count:
+            return f"{name}: no samples"
+        return (f"{name}: n={self.count} p50={self.percentile(50) * 1000:.0f}ms "
+                f"p95={self.percentile(95) * 1000:.0f}ms max={self.percentile(100) * 1000:.0f}ms")
+
+
+# COMPACT UPLOADS FOR CLOUD RECOGNITION
+class EncodedAudioData:
+    """AudioData that carries its own FLAC encoding so recognizers don't re-encode (see voice_class)"""
+    
+    def __init__(self, frame_data, sample_rate, sample_width):
+        super().__init__(frame_data, sample_rate, sample_width)
+        self.flac_data = None
+    
+    def get_flac_data(self, convert_rate=None, convert_width=None):
+        if (self.flac_data is not None and convert_rate in (None, self.sample_rate)
+                and convert_width in (None, self.sample_width)):
+            return self.flac_data
+        return super().get_flac_data(convert_rate, convert_width)
+
+
+class UploadPreparer:
+    """Trims silence, resamples to UPLOAD_SAMPLE_RATE and pre-encodes FLAC"""
+    
+    def __init__(self, recognizer):
+        self.recognizer = recognizer  # energy_threshold decides what counts as silence
+        self.encode_latency = LatencyTracker()
+        self.stats = collections.Counter()
+    
+    def trim(self, raw, sample_rate, sample_width):
+        """Cut leading/trailing frames below the energy threshold, keeping some padding"""
+        frame_bytes = int(sample_rate * UPLOAD_TRIM_FRAME_MS / 1000) * sample_width
+        threshold = self.recognizer.energy_threshold
+        loud = [i for i in range(0, len(raw), frame_bytes)
+                if audioop.rms(raw[i:i + frame_bytes], sample_width) > threshold]
+        if not loud:
+            return raw
+        padding = int(sample_rate * UPLOAD_PADDING_SECONDS) * sample_width
+        return raw[max(loud[0] - padding, 0):loud[-1] + frame_bytes + padding]
+    
+    def prepare(self, audio, encode=True):
+        """Return the smallest AudioData that still recognizes well"""
+        start = time.perf_counter()
+        raw = self.trim(audio.get_raw_data(), audio.sample_rate, audio.sample_width)
+        width = audio.sample_width
+        if width != 2:
+            raw = audioop.lin2lin(raw, width, 2)
+            width = 2
+        rate = audio.sample_rate
+        if rate > UPLOAD_SAMPLE_RATE:
+            raw, _ = audioop.ratecv(raw, width, 1, rate, UPLOAD_SAMPLE_RATE, None)
+            rate = UPLOAD_SAMPLE_RATE
+        prepared = voice_class(EncodedAudioData, "AudioData")(raw, rate, width)
+        
+        if encode:
+            prepared.flac_data = prepared.get_flac_data()
+            upload_bytes = len(prepared.flac_data)
+        else:
+            upload_bytes = len(raw)
+        elapsed = time.perf_counter() - start
+        self.encode_latency.record(elapsed)
+        
+        original_bytes = len(audio.frame_data)
+        self.stats["requests"] += 1
+        self.stats["original_bytes"] += original_bytes
+        self.stats["upload_bytes"] += upload_bytes
+        print(f" Upload: {original_bytes / 1024:.0f} KB → {upload_bytes / 1024:.0f} KB "
+              f"({rate} Hz, {len(raw) / (rate * width):.2f}s, prepared in {elapsed * 1000:.0f} ms)")
+        return prepared
+    
+    def report(self):
+        ratio = self.stats["upload_bytes"] / max(self.stats["original_bytes"], 1)
+        return (f"Uploads: {self.stats['requests']} requests, {self.stats['upload_bytes'] / 1024:.0f} KB sent "
+                f"({ratio:.0%} of captured); " + self.encode_latency.summary("prepare"))
+
+
+# DEADLINE-BOUNDED, HEDGED RECOGNITION
+class HedgedRecognizer:
+    """Runs recognition off the listener thread with a deadline and a hedged second request
+    
+    The primary request gets HEDGE_PERCENTILE of recent latency to answer.
+    After that a second request goes to the fallback backend (or the primary
+    again). The first answer wins and the loser is cancelled; a request that
+    is already on the wire cannot be aborted, so its result is discarded and
+    the socket timeout (operation_timeout) bounds how long it lingers.
+    """
+    
+    def __init__(self, primary, fallback=None, deadline=RECOGNITION_DEADLINE):
+        self.primary = primary
+        self.fallback = fallback or primary
+        self.deadline = deadline
+        for backend in (self.primary, self.fallback):
+            if backend.recognizer.operation_timeout is None:
+                backend.recognizer.operation_timeout = deadline
+        # Room for every pipelined utterance to have its hedge in flight
+        self.executor = ThreadPoolExecutor(max_workers=2 * RECOGNITION_WORKERS, thread_name_prefix="recognize")
+        self.latency = LatencyTracker()          # every individual request
+        self.utterance_latency = LatencyTracker()  # what the listener actually waited
+        self.stats = collections.Counter()
+    
+    def hedge_delay(self):
+        """Current hedge point in seconds"""
+        if self.latency.count < HEDGE_MIN_SAMPLES:
+            return HEDGE_MIN_DELAY * 2
+        return max(HEDGE_MIN_DELAY, self.latency.percentile(HEDGE_PERCENTILE))
+    
+    def _attempt(self, backend, audio):
+        """Worker: returns ("ok", result) | ("unknown", None) | ("error", exception)"""
+        start = time.perf_counter()
+        try:
+            outcome = ("ok", backend.recognize(audio))
+        except sr.UnknownValueError:
+            outcome = ("unknown", None)
+        except Exception as e:
+            outcome = ("error", e)
+        self.latency.record(time.perf_counter() - start)
+        return outcome
+    
+    def _hedge(self, futures, audio):
+        """Submit the hedged request, returns True"""
+        futures[self.executor.submit(self._attempt, self.fallback, audio)] = "hedge"
+        self.stats["hedged"] += 1
+        return True
+    
+    def recognize(self, audio):
+        """Return the first RecognitionResult within the deadline, or None"""
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.deadline
+        hedge_at = time.monotonic() + self.hedge_delay()
+        futures = {self.executor.submit(self._attempt, self.primary, audio): "primary"}
+        hedged = False
+        settled = False
+        result = None
+        winner = None
+        
+        while futures and not settled:
+            now = time.monotonic()
+            if now >= deadline:
+                self.stats["deadline_exceeded"] += 1
+                print(f" Recognition gave up after {self.deadline:.1f}s")
+                break
+            
+            # Fire the hedge when the primary is slower than usual, or failed outright
+            if not hedged and now >= hedge_at:
+                hedged = self._hedge(futures, audio)
+            
+            wake_at = deadline if hedged else min(deadline, hedge_at)
+            done, _ = wait(list(futures), timeout=wake_at - now, return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                role = futures.pop(future)
+                status, value = future.result()
+                if status == "ok":
+                    result, winner = value, role
+                    settled = True
+                    break
+                if status == "unknown":
+                    # A definitive "no speech" - no point waiting for the other request
+                    settled = True
+                    break
+                print(f" {role} recognition failed: {value}")
+                if not hedged:
+                    hedged = self._hedge(futures, audio)
+        
+        # Cancel the loser; one already running can only be left to finish
+        for future in futures:
+            if future.cancel():
+                self.stats["cancelled"] += 1
+            elif not future.done():
+                self.stats["abandoned"] += 1
+        
+        elapsed = time.perf_counter() - start
+        self.utterance_latency.record(elapsed)
+        if result is not None:
+            self.stats[f"{winner}_wins"] += 1
+            print(f" Recognized in {elapsed:.2f}s ({result.backend}, {winner})")
+        return result
+    
+    def report(self):
+        return "\n".join([
+            self.latency.summary("Recognition requests"),
+            self.utterance_latency.summary("Recognition per utterance"),
+            f"Hedged: {self.stats['hedged']}, hedge wins: {self.stats['hedge_wins']}, "
+            f"cancelled: {self.stats['cancelled']}, abandoned in flight: {self.stats['abandoned']}, "
+            f"deadline exceeded: {self.stats['deadline_exceeded']}",
+        ])
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# MICROPHONE MANAGER READING FROM THE SHARED CAPTURE STREAM
+class MicrophoneManager:
+    """Manages listening on top of the shared capture stream"""
+    
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+        self.recognizer.energy_threshold = ENERGY_THRESHOLD
+        self.recognizer.dynamic_energy_threshold = False  # NoiseFloorTracker owns the threshold
+        self.recognizer.pause_threshold = PAUSE_THRESHOLD
+        self.backend = create_recognizer_backend(RECOGNIZER_BACKEND, self.recognizer)
+        fallback = None
+        if HEDGE_FALLBACK_BACKEND:
+            fallback = create_recognizer_backend(HEDGE_FALLBACK_BACKEND, sr.Recognizer())
+        self.hedged = HedgedRecognizer(self.backend, fallback)
+        self.uploads = UploadPreparer(self.recognizer)
+        self.encode_uploads = self.backend.uploads_flac or (fallback is not None and fallback.uploads_flac)
+        self.capture = AudioCaptureStream()
+        self.noise = NoiseFloorTracker(self.recognizer)
+        self.vad = VoiceActivityDetector(self.recognizer)
+        self.source = None  # listener cursor shared by wake word and command listens
+        print(f"✓ Microphone Manager initialized (recognizer: {self.backend.name})")
+    
+    def start(self):
+        """Open the capture stream, the listener cursor and the noise tracker"""
+        if self.source is None:
+            self.capture.start()
+            self.source = self.capture.open_source()
+            self.noise.start(self.capture)
+    
+    def listen(self, timeout=None, phrase_limit=PHRASE_TIME_LIMIT):
+        """Next VAD segment from the shared cursor, or None on timeout/shutdown"""
+        try:
+            segment = self.vad.next_segment(self.source, timeout=timeout, phrase_limit=phrase_limit)
+        except Exception as e:
+            print(f"  Listen error: {e}")
+            return None
+        if segment is not None:
+            print(f" Speech {segment.start:.2f}s → {segment.end:.2f}s")
+        return segment
+    
+    def recognize(self, audio):
+        """Convert audio to a RecognitionResult using the configured backend"""
+        if audio is None:
+            return None
+        return self.hedged.recognize(self.uploads.prepare(audio, encode=self.encode_uploads))
+    
+    def shutdown(self):
+        """Close the capture stream and drop in-flight recognitions"""
+        self.noise.shutdown()
+        self.capture.shutdown()
+        self.hedged.shutdown()
+
+
+# PIPELINED CAPTURE AND RECOGNITION
+PipelineItem = collections.namedtuple("PipelineItem", "seq kind segment decision future")
+
+
+class SpeechPipeline:
+    """Segments audio continuously and recognizes segments on a worker pool
+    
+    The segmenter thread never waits for the network: each segment that
+    passes the wake word stage (or follows one) is handed to the pool and
+    its future is queued in capture order. next_item() (a coroutine on the
+    loop that called start()) hands items back in that same order, so
+    results are reassembled in order no matter which recognition finishes
+    first. Item kinds:
+    
+      "wake"       segment that passed the local wake word stage
+      "follow_up"  segment starting within LISTEN_TIMEOUT after a wake or
+                   barge-in segment
+      "timeout"    nothing was said within LISTEN_TIMEOUT after one
+      "barge_in"   speech over our own playback (already echo-suppressed);
+                   on_barge_in(item, result) runs as soon as it is recognized,
+                   ahead of the in-order queue. It may be a bare wake word,
+                   so a follow-up window opens after it too
+    """
+    
+    def __init__(self, mic_manager, wake_detector, is_listening, is_speaking, on_barge_in):
+        self.mic = mic_manager
+        self.wake_detector = wake_detector
+        self.is_listening = is_listening  # False while listening is paused
+        self.is_speaking = is_speaking
+        self.on_barge_in = on_barge_in
+        self.executor = ThreadPoolExecutor(max_workers=RECOGNITION_WORKERS, thread_name_prefix="pipeline")
+        self.loop = None
+        self.items = None  # asyncio.Queue, created on the consumer's loop
+        self.shutdown_event = threading.Event()
+        self.segmenter_thread = None
+        self.seq = 0
+        self.started_at = None
+        self.max_lag = 0.0
+    
+    def start(self):
+        """Start segmenting; must be called from the event loop that consumes items"""
+        self.loop = asyncio.get_running_loop()
+        self.items = asyncio.Queue()
+        self.started_at = time.monotonic()
+        self.segmenter_thread = threading.Thread(target=self._segmenter, daemon=True)
+        self.segmenter_thread.start()
+    
+    def _emit(self, kind, segment=None, decision=None):
+        future = None
+        if segment is not None:
+            try:
+                future = self.executor.submit(self.mic.recognize, segment.audio)
+            except RuntimeError:  # pool already shut down
+                return
+        item = PipelineItem(self.seq, kind, segment, decision, future)
+        if kind == "barge_in":
+            future.add_done_callback(lambda done: self._barge_in_done(item, done))
+        self._put(item)
+        self.seq += 1
+    
+    def _put(self, item):
+        """Hand an item to the consumer's loop from the segmenter thread"""
+        try:
+            self.loop.call_soon_threadsafe(self.items.put_nowait, item)
+        except RuntimeError:  # loop already closed
+            pass
+    
+    def _barge_in_done(self, item, future):
+        if future.cancelled() or future.exception():
+            return
+        self.on_barge_in(item, future.result())
+    
+    def _segmenter(self):
+        """Capture-side loop: VAD → local wake word stage → recognition pool"""
+        follow_up = False
+        while not self.shutdown_event.is_set():
+            segment = self.mic.listen(timeout=LISTEN_TIMEOUT if follow_up else None)
+            self._track_lag()
+            
+            if segment is None:
+                if self.shutdown_event.is_set() or self.mic.capture.ring.closed:
+                    break
+                if follow_up:
+                    self._emit("timeout")
+                follow_up = False
+                continue
+            
+            if not self.is_listening():
+                follow_up = False
+                continue
+            
+            if follow_up:
+                self._emit("follow_up", segment)
+                follow_up = False
+                continue
+            
+            if self.is_speaking():
+                decision = self.wake_detector.detect(segment.audio, extra_keywords=STOP_WORDS)
+                if decision.fired:
+                    self._emit("barge_in", segment, decision)
+                    follow_up = True
+                continue
+            
+            decision = self.wake_detector.detect(segment.audio)
+            if decision.fired:
+                self._emit("wake", segment, decision)
+                follow_up = True
+        
+        self._put(None)
+    
+    def _track_lag(self):
+        """How far the segmenter is behind live capture, in seconds"""
+        capture = self.mic.capture
+        behind = capture.ring.live_position() - self.mic.source.stream.position
+        self.max_lag = max(self.max_lag, behind * capture.chunk_size / capture.sample_rate)
+    
+    async def next_item(self):
+        """Next item in capture order; None after shutdown"""
+        return await self.items.get()
+    
+    def report(self):
+        wall = time.monotonic() - self.started_at if self.started_at else 0.0
+        audio = self.mic.vad.audio_seconds
+        return (f"Pipeline: {audio:.0f} audio-s processed in {wall:.0f} wall-s "
+                f"({audio / max(wall, 1e-9):.2f}x), {self.seq} items, max lag {self.max_lag:.2f}s")
+    
+    def shutdown(self):
+        self.shutdown_event.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# STATE MANAGER WITH THREAD-SAFE STATE TRANSITIONS
+class StateManager:
+    """Thread-safe state machine for the voice assistant
+    
+    Transitions are checked against STATE_TRANSITIONS. Everything waits on
+    one condition variable: wait_for() blocks until a state is reached, and
+    a watchdog thread sleeps until the current state's STATE_TIMEOUTS
+    deadline and returns a stuck state to IDLE. Observers are called with
+    (old, new, dwell seconds) after every transition.
+    """
+    
+    def __init__(self, transitions=STATE_TRANSITIONS, timeouts=STATE_TIMEOUTS):
+        self.state = ListeningState.IDLE
+        self.transitions = transitions
+        self.timeouts = timeouts
+        self.state_lock = threading.Lock()
+        self.changed = threading.Condition(self.state_lock)
+        self.entered_at = time.monotonic()
+        self.observers = []
+        self.dwell = collections.defaultdict(LatencyTracker)  # state -> time spent in it
+        self.stats = collections.Counter()
+        self.audio_levels = collections.deque(maxlen=AUDIO_LEVEL_HISTORY)
+        self.closed = False
+        self.watchdog = threading.Thread(target=self._watchdog, daemon=True)
+        self.watchdog.start()
+    
+    def get_state(self):
+        """Get current state"""
+        with self.state_lock:
+            return self.state
+    
+    def set_state(self, new_state, expected=None):
+        """Move to new_state if the transition is allowed; returns True if we are now in it
+        
+        With expected, only transition out of that state (compare-and-set),
+        so a late caller can't undo a pause or a timeout.
+        """
+        with self.state_lock:
+            old_state = self.state
+            if old_state == new_state:
+                return True
+            if expected is not None and old_state != expected:
+                return False
+            if new_state not in self.transitions[old_state]:
+                self.stats["rejected"] += 1
+                print(f" State: {old_state.name} → {new_state.name} rejected")
+                return False
+            dwell = self._enter(new_state)
+        print(f" State: {old_state.name} → {new_state.name}")
+        self._notify(old_state, new_state, dwell)
+        return True
+    
+    def _enter(self, new_state):
+        """Switch state with the lock held; returns time spent in the old one"""
+        now = time.monotonic()
+        dwell = now - self.entered_at
+        self.dwell[self.state].record(dwell)
+        self.state = new_state
+        self.entered_at = now
+        self.changed.notify_all()
+        return dwell
+    
+    def _notify(self, old_state, new_state, dwell):
+        for observer in list(self.observers):
+            try:
+                observer(old_state, new_state, dwell)
+            except Exception as e:
+                print(f" State observer error: {e}")
+    
+    def subscribe(self, observer):
+        """Call observer(old_state, new_state, dwell_seconds) after each transition"""
+        self.observers.append(observer)
+    
+    def wait_for(self, *states, timeout=None):
+        """Block until the state is one of states; returns the state, or None on timeout"""
+        with self.changed:
+            if self.changed.wait_for(lambda: self.state in states or self.closed, timeout) and not self.closed:
+                return self.state
+            return None
+    
+    def _watchdog(self):
+        """Return states that outlive their timeout to IDLE - sleeps until the next deadline"""
+        with self.changed:
+            while not self.closed:
+                limit = self.timeouts.get(self.state)
+                if limit is None:
+                    self.changed.wait()
+                    continue
+                remaining = self.entered_at + limit - time.monotonic()
+                if remaining > 0:
+                    self.changed.wait(remaining)
+                    continue
+                old_state = self.state
+                self.stats["timeouts"] += 1
+                dwell = self._enter(ListeningState.IDLE)
+                self.changed.release()
+                try:
+                    print(f" State: {old_state.name} timed out after {dwell:.1f}s → IDLE")
+                    self._notify(old_state, ListeningState.IDLE, dwell)
+                finally:
+                    self.changed.acquire()
+    
+    def report(self):
+        lines = [f"States: {self.stats.get('timeouts', 0)} timeouts, {self.stats.get('rejected', 0)} rejected transitions"]
+        lines += [tracker.summary(f"Dwell {state.name}") for state, tracker in self.dwell.items()]
+        return "\n".join(lines)
+    
+    def close(self):
+        with self.changed:
+            self.closed = True
+            self.changed.notify_all()
+    
+    def record_audio_levels(self, noise_floor, energy_threshold):
+        """Store the latest noise floor / speech threshold (called from the tracker thread)"""
+        with self.state_lock:
+            self.audio_levels.append((time.time(), noise_floor, energy_threshold))
+    
+    def get_audio_levels(self):
+        """Latest (timestamp, noise_floor, energy_threshold) or None"""
+        with self.state_lock:
+            return self.audio_levels[-1] if self.audio_levels else None
+    
+    def get_audio_level_history(self):
+        """All recent (timestamp, noise_floor, energy_threshold) samples, oldest first"""
+        with self.state_lock:
+            return list(self.audio_levels)
+
+
+# INTENT ROUTING
+IntentMatch = collections.namedtuple("IntentMatch", "intent slots start end")
+
+
+def tokenize(text):
+    """Lowercase word tokens - the unit intents are matched on"""
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+
+class IntentRouter:
+    """Token trie compiled from an intent grammar
+    
+    Every pattern (with each slot value expanded in place) becomes a path in
+    one trie, so routing walks the command once per start position and the
+    cost depends on the command length, not on how many intents or slot
+    values are registered. Tokens only match whole words.
+    """
+    
+    def __init__(self, grammar, slots=INTENT_SLOTS):
+        self.anchored = {}    # patterns that must start at the first token
+        self.floating = {}    # patterns that may start anywhere
+        self.order = {intent: rank for rank, (intent, _) in enumerate(grammar)}
+        self.paths = 0
+        for intent, patterns in grammar:
+            for pattern in patterns:
+                self._add(intent, pattern.split(), slots)
+    
+    def _add(self, intent, tokens, slots):
+        anchored = tokens[:1] == ["^"]
+        at_end = tokens[-1:] == ["$"]
+        tokens = [token for token in tokens if token not in ("^", "$")]
+        
+        # Expand slots into concrete token paths, remembering what each one bound
+        paths = [([], {})]
+        for token in tokens:
+            if token.startswith("{") and token.endswith("}"):
+                name = token[1:-1]
+                paths = [(path + tokenize(value), dict(bound, **{name: value}))
+                         for path, bound in paths for value in slots[name]]
+            else:
+                paths = [(path + [token], bound) for path, bound in paths]
+        
+        for path, bound in paths:
+            node = self.anchored if anchored else self.floating
+            for token in path:
+                node = node.setdefault(token, {})
+            node.setdefault(None, []).append((intent, bound, at_end))  # None key marks an ending
+            self.paths += 1
+    
+    def _walk(self, root, tokens, start, matches):
+        node = root
+        for end in range(start, len(tokens)):
+            node = node.get(tokens[end])
+            if node is None:
+                return
+            for intent, bound, at_end in node.get(None, ()):
+                if not at_end or end == len(tokens) - 1:
+                    matches.append(IntentMatch(intent, bound, start, end + 1))
+    
+    def route(self, text):
+        """Best IntentMatch for text, or None"""
+        tokens = tokenize(text)
+        matches = []
+        self._walk(self.anchored, tokens, 0, matches)
+        for start in range(len(tokens)):
+            self._walk(self.floating, tokens, start, matches)
+        if not matches:
+            return None
+        return min(matches, key=lambda m: (m.start - m.end, self.order[m.intent], m.start))
+
+
+def benchmark_intent_router(sizes=(10, 100, 1000), commands=2000):
+    """Routing cost per command as the grammar grows, against a substring if-chain"""
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(5000)]
+    results = []
+    for size in sizes:
+        grammar = [(f"intent{i}", [" ".join(rng.sample(vocabulary, rng.randint(1, 3)))]) for i in range(size)]
+        grammar.append(("open_site", ["open {site}"]))
+        sites = {f"site{i}": "" for i in range(size)}
+        
+        build_start = time.perf_counter()
+        router = IntentRouter(grammar, {"site": sites})
+        build_time = time.perf_counter() - build_start
+        
+        phrases = [rng.choice(grammar[:-1])[1][0] for _ in range(commands // 2)]
+        phrases += [f"open site{rng.randrange(size)}" for _ in range(commands // 4)]
+        phrases += [" ".join(rng.sample(vocabulary, 6)) for _ in range(commands // 4)]
+        texts = [f"please {phrase} now" for phrase in phrases]
+        
+        start = time.perf_counter()
+        for text in texts:
+            router.route(text)
+        routed = (time.perf_counter() - start) / len(texts)
+        
+        chain = [pattern for _, patterns in grammar[:-1] for pattern in patterns] + [f"open {site}" for site in sites]
+        start = time.perf_counter()
+        for text in texts:
+            next((pattern for pattern in chain if pattern in text), None)
+        scanned = (time.perf_counter() - start) / len(texts)
+        results.append((size, router.paths, build_time, routed, scanned))
+    return results
+
+
+# ASYNCIO CORE AND TK BRIDGE
+class AsyncCore:
+    """One asyncio event loop, on its own thread, for the assistant's tasks
+    
+    The voice listener, action timeouts and UI-facing callbacks run here as
+    tasks. Device and engine threads (capture, TTS, earcons) stay threads
+    and talk to the loop through futures. shutdown() cancels every task and
+    finishes within a fixed deadline.
+    """
+    
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.tasks = set()
+        self.thread = threading.Thread(target=self._run, name="asyncio", daemon=True)
+    
+    def start(self):
+        self.thread.start()
+        print("✓ Event loop started")
+    
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        self.loop.close()
+    
+    async def _track(self, coro):
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        try:
+            return await coro
+        finally:
+            self.tasks.discard(task)
+    
+    def spawn(self, coro):
+        """Run a coroutine as a task on the loop (from any thread); returns a concurrent Future"""
+        future = asyncio.run_coroutine_threadsafe(self._track(coro), self.loop)
+        name = getattr(coro, "__qualname__", "task")
+        future.add_done_callback(lambda done: self._report_failure(name, done))
+        return future
+    
+    @staticmethod
+    def _report_failure(name, future):
+        """Print what killed a task - nobody may ever call result() on its future"""
+        if future.cancelled() or future.exception() is None:
+            return
+        e = future.exception()
+        print(f" Task {name} failed: {type(e).__name__}: {e}")
+    
+    def call_soon(self, fn, *args):
+        """Run a plain callable on the loop thread"""
+        self.loop.call_soon_threadsafe(fn, *args)
+    
+    async def _stop(self, cleanup, deadline):
+        tasks = [task for task in self.tasks if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=max(0.0, deadline - time.monotonic()))
+        
+        # Component shutdown still blocks on threads - bound it from here
+        cleanup_done = self.loop.run_in_executor(None, cleanup)
+        try:
+            await asyncio.wait_for(cleanup_done, max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            print(" Shutdown deadline reached - exiting anyway")
+        except Exception as e:
+            print(f" Shutdown cleanup error: {e}")
+    
+    def shutdown(self, cleanup, timeout=SHUTDOWN_TIMEOUT):
+        """Cancel all tasks, run cleanup() off the loop, stop the loop - all within timeout"""
+        deadline = time.monotonic() + timeout
+        if self.thread.is_alive():
+            try:
+                asyncio.run_coroutine_threadsafe(self._stop(cleanup, deadline), self.loop).result(
+                    max(0.0, deadline - time.monotonic()) + 0.1)
+            except Exception:
+                pass  # timed out: daemon threads go down with the process
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(max(0.0, deadline - time.monotonic()))
+        else:
+            cleanup()
+
 
-# THREADING-SAFE TTS MANAGER
+def exit_within_deadline(deadline, code=0):
+    """Exit right away if threads are still running at the shutdown deadline
+    
+    Python joins executor workers when the interpreter exits, daemon or
+    not, so one hung action would otherwise keep the process alive
+    indefinitely. Returns normally if every other thread finishes in time.
+    """
+    def running():
+        return [thread for thread in threading.enumerate()
+                if thread.is_alive() and thread is not threading.current_thread()]
+    
+    for thread in running():
+        thread.join(max(0.0, deadline - time.monotonic()))
+    stuck = running()
+    if stuck:
+        print(f" Abandoning {len(stuck)} busy thread(s): {', '.join(thread.name for thread in stuck)}")
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
 
 
-class TTSManager:
-    """Thread-safe text-to-speech manager using queue"""
+class TkBridge:
+    """Marshals calls between the asyncio core and the Tk main loop
     
-    def __init__(self):
-        self.tts_queue = queue.Queue()
-        self.shutdown_event = threading.Event()
-        self.worker_thread = threading.Thread(target=self._tts_worker, daemon=True)
-        self.worker_thread.start()
-        print("✓ TTS Manager initialized")
+    Tk may only be touched from its own thread: call() queues a function
+    that the Tk side runs on its next after() tick. handler() wraps an async
+    function as a Tk event callback that runs it on the core instead.
+    """
     
-    def _tts_worker(self):
-        """Worker thread that processes TTS requests"""
-        engine = pyttsx3.init()  # One engine per thread - thread safe!
-        
-        while not self.shutdown_event.is_set():
+    def __init__(self, root, core, interval_ms=UI_BRIDGE_INTERVAL_MS):
+        self.root = root
+        self.core = core
+        self.interval_ms = interval_ms
+        self.calls = queue.SimpleQueue()
+        self.running = False
+    
+    def start(self):
+        self.running = True
+        self.root.after(self.interval_ms, self._drain)
+    
+    def stop(self):
+        self.running = False
+    
+    def call(self, fn, *args):
+        """Run fn(*args) on the Tk thread (safe from any thread)"""
+        self.calls.put((fn, args))
+    
+    def _drain(self):
+        if not self.running:
+            return
+        while True:
             try:
-                # Get text from queue with timeout to allow shutdown checks
-                text = self.tts_queue.get(timeout=0.5)
-                
-                if text is None:  # Shutdown signal
-                    break
-                
-                try:
-                    engine.say(text)
-                    engine.runAndWait()
-                except Exception as e:
-                    print(f"  TTS error: {e}")
-                
-                self.tts_queue.task_done()
-                
+                fn, args = self.calls.get_nowait()
             except queue.Empty:
-                continue
+                break
+            try:
+                fn(*args)
             except Exception as e:
-                print(f" TTS worker error: {e}")
+                print(f" UI update error: {e}")
+        self.root.after(self.interval_ms, self._drain)
     
-    def speak(self, text):
-        """Queue text for speaking"""
-        if not self.shutdown_event.is_set():
-            self.tts_queue.put(text)
+    def handler(self, coroutine_fn):
+        """Tk event callback that runs coroutine_fn(event) on the event loop"""
+        def on_event(event=None):
+            self.core.spawn(coroutine_fn(event))
+        return on_event
+
+
+# UI EVENT QUEUE
+UIEvent = collections.namedtuple("UIEvent", "kind detail published_at")
+
+
+class UIEventQueue:
+    """Hand-off of UI events from worker threads to the Tk loop
     
-    def shutdown(self):
-        """Gracefully shutdown TTS worker"""
-        self.shutdown_event.set()
-        self.tts_queue.put(None)  # Signal worker to stop
-        self.worker_thread.join(timeout=2)
+    publish() is a single deque.append - atomic, so workers never take a lock
+    or touch Tk. The Tk side calls drain() once per frame; at most
+    UI_EVENTS_PER_FRAME events are taken per frame and the queue keeps only
+    the newest UI_EVENT_LIMIT, so a burst costs a bounded amount of UI time.
+    """
+    
+    def __init__(self, limit=UI_EVENT_LIMIT):
+        self.events = collections.deque(maxlen=limit)
+        self.latency = LatencyTracker()     # publish to pixels on screen
+        self.frame_time = LatencyTracker()  # UI thread time spent per non-empty frame
+        self.published = 0
+    
+    def publish(self, kind, detail=None):
+        """Queue an event (any thread)"""
+        self.published += 1
+        self.events.append(UIEvent(kind, detail, time.perf_counter()))
+    
+    def drain(self, limit=UI_EVENTS_PER_FRAME):
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self.events.popleft())
+            except IndexError:
+                break
+        return events
+    
+    def rendered(self, events, frame_started):
+        """Record latency once the frame showing these events has been drawn"""
+        now = time.perf_counter()
+        for event in events:
+            self.latency.record(now - event.published_at)
+        self.frame_time.record(now - frame_started)
+    
+    def report(self):
+        dropped = max(0, self.published - self.latency.count - len(self.events))
+        return (f"UI events: {self.published} published, {dropped} dropped in bursts\n"
+                + self.latency.summary("Event to pixels") + "\n"
+                + self.frame_time.summary("UI frame work"))
 
 
-# MICROPHONE MANAGER WITH THREAD-SAFE ACCESS
-class MicrophoneManager:
-    """Manages microphone access with proper locking"""
+# ASYNCHRONOUS ACTION EXECUTOR
+ActionResult = collections.namedtuple("ActionResult", "name status error queue_wait latency")
+
+
+class ActionExecutor:
+    """Bounded worker pool for command actions, supervised from the event loop
     
-    def __init__(self):
-        self.recognizer = sr.Recognizer()
-        self.recognizer.energy_threshold = ENERGY_THRESHOLD
-        self.recognizer.dynamic_energy_threshold = True
-        self.recognizer.pause_threshold = PAUSE_THRESHOLD
-        self.mic_lock = threading.Lock()
-        self._calibrated = False
-        print("✓ Microphone Manager initialized")
+    submit() returns at once with a Future. At most ACTION_WORKERS actions
+    run and ACTION_QUEUE_LIMIT wait; beyond that submissions are refused.
+    Each action gets one ActionResult via on_result (and the Future), with
+    status "ok", "failed" (handler returned False), "error" or "timeout".
+    Timeouts are loop timers; a timed-out action can't be killed - its
+    worker stays busy until it returns - but the listener hears about it
+    on time. Waiting for a worker has its own limit, ACTION_QUEUE_TIMEOUT:
+    an action that never got one is dropped and also reported as "timeout".
+    """
     
-    def calibrate(self):
-        """One-time ambient noise calibration"""
-        if self._calibrated:
-            return
+    def __init__(self, core, workers=ACTION_WORKERS, queue_limit=ACTION_QUEUE_LIMIT):
+        self.core = core
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="action")
+        self.slots = threading.BoundedSemaphore(workers + queue_limit)
+        self.on_result = None
+        self.latency = collections.defaultdict(LatencyTracker)  # action name -> run time
+        self.queue_wait = LatencyTracker()
+        self.stats = collections.Counter()
+    
+    def submit(self, name, fn, *args, timeout=ACTION_TIMEOUT):
+        """Run fn(*args) on a worker; returns a Future of ActionResult, or None if refused"""
+        if not self.slots.acquire(blocking=False):
+            self.stats["refused"] += 1
+            return None
+        try:
+            return self.core.spawn(self._supervise(name, fn, args, timeout, time.monotonic()))
+        except RuntimeError:  # loop closed
+            self.slots.release()
+            return None
+    
+    async def _supervise(self, name, fn, args, timeout, submitted_at):
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+        timing = {}
+        claim = threading.Lock()  # the worker starting vs. the queue timeout giving up - first one wins
         
+        def run():
+            with claim:
+                if timing.get("dropped"):
+                    return None  # gave up waiting; the slot is already released
+                timing["started"] = time.monotonic()
+            loop.call_soon_threadsafe(started.set)
+            self.queue_wait.record(timing["started"] - submitted_at)
+            try:
+                return "ok" if fn(*args) else "failed"
+            finally:
+                timing["elapsed"] = time.monotonic() - timing["started"]
+                self.latency[name].record(timing["elapsed"])
+                self.slots.release()
+        
+        work = loop.run_in_executor(self.executor, run)
+        error = None
         try:
-            with self.mic_lock:
-                with sr.Microphone() as mic:
-                    print("🎤 Calibrating microphone...")
-                    self.recognizer.adjust_for_ambient_noise(mic, duration=1.0)
-                    self._calibrated = True
-                    print("✓ Microphone calibrated")
+            # Queue wait doesn't count against the action's timeout, but has a limit of its own
+            try:
+                await asyncio.wait_for(started.wait(), ACTION_QUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                with claim:
+                    if "started" not in timing:
+                        timing["dropped"] = True
+                        self.slots.release()
+            if timing.get("dropped"):
+                work.cancel()
+                status, error = "timeout", TimeoutError(f"no free worker within {ACTION_QUEUE_TIMEOUT:.0f}s")
+            else:
+                remaining = timeout - (time.monotonic() - timing["started"])
+                status = await asyncio.wait_for(asyncio.shield(work), max(0.0, remaining))
+        except asyncio.TimeoutError:
+            status, error = "timeout", None
+            work.add_done_callback(lambda _: print(
+                f" Action {name} finished {timing.get('elapsed', 0):.1f}s after starting (timed out)"))
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            print(f"  Calibration failed: {e}")
-    
-    def listen_for_wake_word(self, timeout=2, phrase_limit=3):
-        """Listen for wake word with proper locking"""
-        with self.mic_lock:
+            status, error = "error", e
+        
+        waited = timing.get("started", time.monotonic()) - submitted_at
+        result = ActionResult(name, status, error, waited, timing.get("elapsed", 0.0 if "dropped" in timing else timeout))
+        self.stats[status] += 1
+        if status != "ok":
+            print(f" Action {name}: {status}" + (f" ({error})" if error else ""))
+        if self.on_result:
             try:
-                with sr.Microphone() as mic:
-                    audio = self.recognizer.listen(mic, timeout=timeout, phrase_time_limit=phrase_limit)
-                    return audio
-            except sr.WaitTimeoutError:
-                return None
+                self.on_result(result)
             except Exception as e:
-                print(f"  Wake word listen error: {e}")
-                return None
+                print(f" Action result handler error: {e}")
+        return result
     
-    def listen_for_command(self, timeout=LISTEN_TIMEOUT, phrase_limit=PHRASE_TIME_LIMIT):
-        """Listen for full command with proper locking"""
-        with self.mic_lock:
-            try:
-                with sr.Microphone() as mic:
-                    audio = self.recognizer.listen(mic, timeout=timeout, phrase_time_limit=phrase_limit)
-                    return audio
-            except sr.WaitTimeoutError:
-                return None
-            except Exception as e:
-                print(f"  Command listen error: {e}")
-                return None
+    def report(self):
+        lines = [f"Actions: {self.stats.get('ok', 0)} ok, {self.stats.get('failed', 0)} failed, "
+                 f"{self.stats.get('error', 0)} errors, {self.stats.get('timeout', 0)} timeouts, "
+                 f"{self.stats.get('refused', 0)} refused",
+                 self.queue_wait.summary("Action queue wait")]
+        lines += [tracker.summary(f"Action {name}") for name, tracker in self.latency.items()]
+        return "\n".join(lines)
     
-    def recognize_speech(self, audio):
-        """Convert audio to text using Google Speech Recognition"""
-        if audio is None:
-            return None
-        
-        try:
-            return self.recognizer.recognize_google(audio)
-        except sr.UnknownValueError:
-            return None
-        except sr.RequestError as e:
-            print(f" Google API error: {e}")
-            return None
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
 
-# STATE MANAGER WITH THREAD-SAFE STATE TRANSITIONS
-class StateManager:
-    """Thread-safe state management for voice assistant"""
+# COMMAND PLUGIN REGISTRY
+class CommandContext:
+    """What plugin handlers get to work with"""
     
-    def __init__(self):
-        self.state = ListeningState.IDLE
-        self.state_lock = threading.Lock()
+    def __init__(self, tts_manager, data_dir=None):
+        self.tts = tts_manager
+        self.sites = COMMON_SITES
+        self.time_words = time_words
+        self.high_priority = SPEECH_PRIORITY_HIGH
+        self.latency_tracker = LatencyTracker
+        self.data_dir = data_dir or os.getcwd()
+
+
+class CommandRegistry:
+    """Command plugins by name; handler modules are imported on first use
     
-    def get_state(self):
-        """Get current state"""
-        with self.state_lock:
-            return self.state
+    Startup only reads the plugin declarations (name, patterns, module), so
+    dependencies like pyautogui are paid for by the first command that
+    needs them rather than by every launch. A loaded module may define
+    report() and shutdown() for state it keeps between commands.
+    """
     
-    def set_state(self, new_state):
-        """Set new state with logging"""
-        with self.state_lock:
-            if self.state != new_state:
-                print(f" State: {self.state.name} → {new_state.name}")
-                self.state = new_state
+    def __init__(self, plugins=COMMAND_PLUGINS):
+        self.plugins = {plugin.name: plugin for plugin in plugins}
+        self.handlers = {}
+        self.modules = {}  # module name -> loaded module
+        self.import_times = {}  # module -> seconds spent importing it
+        self.lock = threading.Lock()
     
-    def is_busy(self):
-        """Check if assistant is currently busy"""
-        with self.state_lock:
-            return self.state != ListeningState.IDLE
+    def grammar(self):
+        return [(plugin.name, plugin.patterns) for plugin in self.plugins.values()]
+    
+    def slots(self, shared=INTENT_SLOTS):
+        """Slot values for the router: the shared ones plus those plugins declare"""
+        slots = dict(shared)
+        for plugin in self.plugins.values():
+            for name, values in (plugin.slots or {}).items():
+                if name in slots and list(slots[name]) != list(values):
+                    raise ValueError(f"Plugin {plugin.name} redefines slot '{name}'")
+                slots[name] = values
+        return slots
+    
+    def handler(self, name):
+        """The handler function for a plugin, importing its module if needed"""
+        with self.lock:
+            if name not in self.handlers:
+                plugin = self.plugins[name]
+                start = time.perf_counter()
+                module = importlib.import_module(plugin.module)
+                self.modules[plugin.module] = module
+                if plugin.module not in self.import_times:
+                    self.import_times[plugin.module] = time.perf_counter() - start
+                    print(f" Loaded {plugin.module} in {self.import_times[plugin.module] * 1000:.0f} ms")
+                self.handlers[name] = getattr(module, plugin.function)
+            return self.handlers[name]
+    
+    def preload(self):
+        """Import every plugin module now (run in the background once the pet is up)"""
+        for name in self.plugins:
+            try:
+                self.handler(name)
+            except Exception as e:
+                print(f" Plugin {name} unavailable: {e}")
+    
+    def report(self):
+        if not self.import_times:
+            return "Command plugins: none loaded"
+        loaded = ", ".join(f"{module} {seconds * 1000:.0f}ms" for module, seconds in self.import_times.items())
+        lines = [f"Command plugins: {len(self.handlers)}/{len(self.plugins)} loaded ({loaded})"]
+        lines += [module.report() for module in self._hooks("report")]
+        return "\n".join(line for line in lines if line)
+    
+    def shutdown(self):
+        for module in self._hooks("shutdown"):
+            try:
+                module.shutdown()
+            except Exception as e:
+                print(f" Plugin {module.__name__} shutdown error: {e}")
+    
+    def _hooks(self, name):
+        """Loaded plugin modules that define the hook name"""
+        with self.lock:
+            return [module for module in self.modules.values() if callable(getattr(module, name, None))]
 
 
 # COMMAND PROCESSOR
 class CommandProcessor:
-    """Processes voice commands"""
+    """Routes voice commands to plugin handlers"""
     
-    def __init__(self, tts_manager):
+    def __init__(self, tts_manager, registry=None, data_dir=None):
+        self.registry = registry or CommandRegistry()
+        self.router = IntentRouter(self.registry.grammar(), self.registry.slots())
+        self.context = CommandContext(tts_manager, data_dir)
         self.tts = tts_manager
     
-    def process(self, command):
-        """Process a voice command and execute appropriate action"""
+    def route(self, command):
+        """IntentMatch for a command; says so and returns None if nothing matches"""
         if not command:
-            return False
+            return None
         
-        command_lower = command.lower()
         print(f" Processing: '{command}'")
-        
-        # Check common websites
-        for site_name, url in COMMON_SITES.items():
-            if site_name in command_lower and ("open" in command_lower or command_lower.strip() == site_name):
-                webbrowser.open(url)
-                self.tts.speak(f"OPENING {site_name.upper()}")
-                print(f"✓ Opened {url}")
-                return True
-        
-        # Open custom website
-        if "open site" in command_lower or "open website" in command_lower:
-            self.tts.speak("WHICH SITE?")
-            # Note: This would need additional mic access - simplified for now
-            return True
-        
-        # Volume controls
-        if "volume up" in command_lower:
-            pyautogui.press("volumeup")
-            self.tts.speak("VOLUME UP")
-            return True
-        
-        if "volume down" in command_lower:
-            pyautogui.press("volumedown")
-            self.tts.speak("VOLUME DOWN")
-            return True
-        
-        if "mute" in command_lower:
-            pyautogui.press("volumemute")
-            self.tts.speak("MUTED")
-            return True
-        
-        # Time query
-        if "time" in command_lower or "what time" in command_lower:
-            current_time = time.strftime("%I:%M %p")
-            self.tts.speak(f"THE TIME IS {current_time}")
-            print(f" Time: {current_time}")
-            return True
-        
-        # Screenshot
-        if "screenshot" in command_lower or "screen shot" in command_lower:
-            try:
-                screenshot = pyautogui.screenshot()
-                screenshot.save(f"screenshot_{int(time.time())}.png")
-                self.tts.speak("SCREENSHOT TAKEN")
-                return True
-            except Exception as e:
-                print(f" Screenshot error: {e}")
-                self.tts.speak("SCREENSHOT FAILED")
-                return True
-        
-        # Minimize all windows
-        if "minimize" in command_lower or "show desktop" in command_lower:
-            pyautogui.hotkey('win', 'd')
-            self.tts.speak("MINIMIZED")
-            return True
-        
-        # Command not recognized
-        self.tts.speak("I CAN ONLY DO SYSTEM COMMANDS. NO AI CHAT IN THIS VERSION")
-        return False
+        match = self.router.route(command)
+        if match is None:
+            # Command not recognized
+            self.tts.speak("I CAN ONLY DO SYSTEM COMMANDS. NO AI CHAT IN THIS VERSION")
+        return match
+    
+    def run(self, match):
+        """Execute a routed command (imports its plugin on first use)"""
+        return self.registry.handler(match.intent)(self.context, **match.slots)
+    
+    def timeout_for(self, match):
+        return self.registry.plugins[match.intent].timeout or ACTION_TIMEOUT
+    
+    def report(self):
+        return self.registry.report()
+    
+    def shutdown(self):
+        self.registry.shutdown()
 
 
 # VOICE ASSISTANT COORDINATOR
 class VoiceAssistant:
     """Coordinates all voice assistant components"""
     
-    def __init__(self, tts_manager, mic_manager, state_manager, command_processor):
+    def __init__(self, tts_manager, mic_manager, state_manager, command_processor, core):
+        self.core = core
         self.tts = tts_manager
         self.mic = mic_manager
         self.state = state_manager
         self.commands = command_processor
+        self.wake_detector = WakeWordDetector(mic_manager.recognizer)
+        self.pipeline = SpeechPipeline(
+            mic_manager, self.wake_detector, self._listening_enabled,
+            tts_manager.is_speaking, self._on_barge_in,
+        )
+        mic_manager.noise.on_update = state_manager.record_audio_levels
+        mic_manager.vad.echo = EchoSuppressor(tts_manager.echo_reference)
+        self.barge_in_latency = LatencyTracker()
+        self.actions = ActionExecutor(core)
+        self.actions.on_result = self._on_action_result
+        self.on_event = None  # on_event(kind, detail) for the UI - set by the GUI
         self.shutdown_event = threading.Event()
-        self.listener_thread = None
+        self.listener_task = None
     
     def start_background_listener(self):
-        """Start the background wake word detection"""
-        self.listener_thread = threading.Thread(target=self._background_listener, daemon=True)
-        self.listener_thread.start()
+        """Start the background wake word detection as a task on the event loop"""
+        self.listener_task = self.core.spawn(self._background_listener())
         print("✓ Background listener started")
     
-    def _background_listener(self):
-        """Background thread that listens for wake words"""
+    async def _background_listener(self):
+        """Listener task that consumes pipelined recognitions in order"""
         print(f" Listening for wake words: {', '.join(WAKE_WORDS)}")
         
-        # Calibrate microphone once
-        self.mic.calibrate()
+        # Open the shared capture stream once; the noise floor adapts from here on
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.mic.start)
+        except Exception as e:
+            print(f" Microphone unavailable: {e}")
+            return
+        self.pipeline.start()
         
-        while not self.shutdown_event.is_set():
-            # Skip if already processing a command
-            if self.state.is_busy():
-                time.sleep(0.1)
-                continue
+        awaiting_command = None  # wake segment whose command we are waiting for
+        
+        while True:
+            item = await self.pipeline.next_item()
+            if item is None:
+                break
             
-            # Listen for wake word
-            audio = self.mic.listen_for_wake_word(timeout=2, phrase_limit=3)
+            # Waiting on the future here is what keeps results in capture order
+            result = None
+            if item.future:
+                await asyncio.wait([asyncio.wrap_future(item.future)])
+                if not item.future.cancelled():
+                    if item.future.exception():
+                        print(f" Recognition error: {item.future.exception()}")
+                        self._publish("error", "recognition")
+                    else:
+                        result = item.future.result()
+            text = result.text if result else None
             
-            if audio is None:
+            if awaiting_command is not None and self.state.get_state() != ListeningState.LISTENING_FOR_COMMAND:
+                awaiting_command = None  # paused or timed out by the watchdog since the wake word
+            
+            if awaiting_command is not None:
+                wake_segment, awaiting_command = awaiting_command, None
+                
+                if item.kind == "timeout":
+                    self.tts.play_earcon("error")
+                    self._publish("error", "no command")
+                    self.tts.speak("I DID NOT HEAR ANYTHING", priority=SPEECH_PRIORITY_HIGH)
+                    self.state.set_state(ListeningState.IDLE, expected=ListeningState.LISTENING_FOR_COMMAND)
+                    continue
+                
+                print(f" Handoff: command starts {item.segment.start - wake_segment.end:.2f}s after wake word")
+                
+                if text is None:
+                    self.tts.play_earcon("error")
+                    self._publish("error", "not understood")
+                    self.tts.speak("I DID NOT UNDERSTAND", priority=SPEECH_PRIORITY_HIGH)
+                    self.state.set_state(ListeningState.IDLE, expected=ListeningState.LISTENING_FOR_COMMAND)
+                    continue
+                
+                print(f" Command received: '{text}'")
+                self._handle_command(text)
                 continue
             
-            # Recognize wake word
-            text = self.mic.recognize_speech(audio)
+            # Barge-in items carry on like wake items (e.g. "pixel, open youtube" over speech)
+            if item.kind == "wake" and not text:
+                self.wake_detector.record_outcome(item.decision, False)
             
-            if text is None:
+            if not text:
                 continue
             
             command_lower = text.lower()
@@ -339,60 +2892,86 @@ class VoiceAssistant:
                 detected_word = "pixel"
                 extracted_command = command_lower.replace("pixel", "", 1).strip()
             
+            if item.kind == "wake":
+                self.wake_detector.record_outcome(item.decision, wake_detected)
             if not wake_detected:
                 continue
             
             print(f"✓ Wake word detected: '{detected_word}'")
-            self.state.set_state(ListeningState.WAKE_WORD_DETECTED)
+            if not self.state.set_state(ListeningState.WAKE_WORD_DETECTED):
+                continue  # paused since this was captured
             
             # If command was included with wake word, use it
             if extracted_command:
                 print(f" Inline command: '{extracted_command}'")
                 self._handle_command(extracted_command)
             else:
-                # Ask for command
+                # Acknowledge with the chime - the pipeline is already capturing whatever comes next
                 self.state.set_state(ListeningState.LISTENING_FOR_COMMAND)
-                self.tts.speak("YES?")
-                
-                # Wait a moment for TTS to start
-                time.sleep(0.3)
-                
-                # Listen for the actual command
-                command_audio = self.mic.listen_for_command(timeout=5, phrase_limit=10)
-                
-                if command_audio is None:
-                    self.tts.speak("I DID NOT HEAR ANYTHING")
-                    self.state.set_state(ListeningState.IDLE)
-                    continue
-                
-                user_command = self.mic.recognize_speech(command_audio)
-                
-                if user_command is None:
-                    self.tts.speak("I DID NOT UNDERSTAND")
-                    self.state.set_state(ListeningState.IDLE)
-                    continue
-                
-                print(f" Command received: '{user_command}'")
-                self._handle_command(user_command)
+                self.tts.play_earcon("wake")
+                awaiting_command = item.segment
+    
+    def _on_barge_in(self, item, result):
+        """Cut speech off when the user says a stop word or the wake word over it"""
+        if result is None or not self.tts.is_speaking():
+            return
+        text = result.text.lower()
+        if not any(word in text for word in STOP_WORDS + WAKE_WORDS):
+            return
+        silenced_at = self.tts.interrupt()
+        spoken_at = self.mic.capture.time_of(item.segment.end_position)
+        if silenced_at:
+            self.barge_in_latency.record(silenced_at - spoken_at)
+            print(f" Barge-in: '{text}' → silence {silenced_at - spoken_at:.2f}s after speech ended")
+    
+    def _publish(self, kind, detail=None):
+        if self.on_event:
+            self.on_event(kind, detail)
+    
+    def _listening_enabled(self):
+        return self.state.get_state() != ListeningState.PAUSED
     
     def _handle_command(self, command):
-        """Handle a recognized command"""
-        try:
-            self.state.set_state(ListeningState.PROCESSING)
-            self.commands.process(command)
-        except Exception as e:
-            print(f" Command processing error: {e}")
-            self.tts.speak("SORRY SOMETHING WENT WRONG")
-        finally:
-            # Small delay before returning to idle
-            time.sleep(0.5)
-            self.state.set_state(ListeningState.IDLE)
+        """Route a recognized command and hand its action to the executor"""
+        if not self.state.set_state(ListeningState.PROCESSING):
+            return  # paused while the command was being recognized
+        match = self.commands.route(command)
+        if match is not None:
+            future = self.actions.submit(match.intent, self.commands.run, match,
+                                         timeout=self.commands.timeout_for(match))
+            if future is None:
+                self.tts.play_earcon("error")
+                self.tts.speak("I AM STILL BUSY", priority=SPEECH_PRIORITY_HIGH)
+        # Back to listening straight away - results arrive via _on_action_result
+        self.state.set_state(ListeningState.IDLE, expected=ListeningState.PROCESSING)
+    
+    def _on_action_result(self, result):
+        """Feedback for a finished action (runs on the event loop)"""
+        if result.status == "ok":
+            self.tts.play_earcon("done")
+        elif result.status in ("error", "timeout"):
+            self.tts.play_earcon("error")
+            self._publish("error", f"{result.name} {result.status}")
+            self.tts.speak("SORRY SOMETHING WENT WRONG", priority=SPEECH_PRIORITY_HIGH)
     
     def shutdown(self):
         """Shutdown the voice assistant"""
         self.shutdown_event.set()
-        if self.listener_thread:
-            self.listener_thread.join(timeout=2)
+        self.pipeline.shutdown()
+        self.mic.shutdown()
+        self.actions.shutdown()
+        self.commands.shutdown()
+        print(self.pipeline.report())
+        print(self.mic.vad.report())
+        print(self.mic.hedged.report())
+        print(self.mic.uploads.report())
+        print(self.mic.vad.echo.report())
+        print(self.barge_in_latency.summary("Stop-to-silence"))
+        print(self.wake_detector.report())
+        print(self.actions.report())
+        print(self.commands.report())
+        self.state.close()
+        print(self.state.report())
 
 
 # APPLICATION PATH
@@ -403,222 +2982,501 @@ else:
     application_path = os.path.dirname(os.path.abspath(__file__))
 
 
-# INITIALIZE COMPONENTS
-
-print("="*50)
-print("PIXEL PET - FIXED VERSION")
-print("="*50)
-print("All critical bugs resolved!")
-print("="*50 + "\n")
-
-# Initialize managers
-tts_manager = TTSManager()
-mic_manager = MicrophoneManager()
-state_manager = StateManager()
-command_processor = CommandProcessor(tts_manager)
-voice_assistant = VoiceAssistant(tts_manager, mic_manager, state_manager, command_processor)
-
-# Random startup greeting
-startup_greeting = random.choice(STARTUP_GREETINGS)
-print(startup_greeting)
-tts_manager.speak(startup_greeting)
-
-# CREATE GUI WINDOW
-root = tk.Tk()
-root.overrideredirect(True)
-root.attributes("-topmost", True)
-root.wm_attributes("-transparentcolor", "white")
-
-# LOAD ANIMATION FRAMES
-frames = []
-assets_path = os.path.join(application_path, "assets")
-print(f"\nLooking for images in: {assets_path}")
-
-try:
-    for i in range(1, 9):
-       
-        img_path = os.path.join(assets_path, f"Didle{i}.png")
-        if os.path.exists(img_path):
-            frames.append(ImageTk.PhotoImage(Image.open(img_path)))
-            print(f"  ✓ Loaded Didle{i}.png")
+# OFFLINE REPORTS
+
+def run_wake_word_report(samples_dir):
+    import_voice_stack()
+    report_recognizer = sr.Recognizer()
+    report_recognizer.energy_threshold = ENERGY_THRESHOLD
+    results = WakeWordDetector(report_recognizer).evaluate(load_wake_word_samples(samples_dir))
+    print(f"Positives: {results['positives']}  Negatives: {results['negatives']}")
+    print(f"False accept rate: {results['false_accept_rate']:.1%}")
+    print(f"False reject rate: {results['false_reject_rate']:.1%}")
+
+
+def run_recognizer_comparison(samples_dir, names):
+    import_voice_stack()
+    report_recognizer = sr.Recognizer()
+    backends = [create_recognizer_backend(name, report_recognizer) for name in names]
+    results = compare_recognizer_backends(load_transcribed_samples(samples_dir), backends)
+    for name, result in results.items():
+        print(f"{name:>8}: {result['latency'] * 1000:7.0f} ms mean, "
+              f"WER {result['wer']:.1%}, {result['failures']} failures")
+
+
+def run_intent_benchmark():
+    print(f"{'intents':>8} {'paths':>7} {'build':>9} {'trie/cmd':>10} {'if-chain/cmd':>13}")
+    for size, paths, build_time, routed, scanned in benchmark_intent_router():
+        print(f"{size:>8} {paths:>7} {build_time * 1000:7.1f}ms {routed * 1e6:8.1f}us {scanned * 1e6:11.1f}us")
+
+
+def summarize_import_times(log, top=STARTUP_BENCHMARK_TOP):
+    """Top-level imports by cumulative time, from `python -X importtime` stderr"""
+    totals = collections.Counter()
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("   "):
+            continue  # nested import - already counted in its parent's cumulative time
+        totals[name.strip().split(".")[0]] += int(cumulative)
+    lines = [f"    {'cumulative':>10}  top-level import ({sum(totals.values()) / 1000:.0f} ms in total)"]
+    for name, micros in totals.most_common(top):
+        lines.append(f"    {micros / 1000:8.1f}ms  {name}")
+    return "\n".join(lines)
+
+
+def run_startup_benchmark():
+    """Cold-start each mode in a fresh interpreter under -X importtime"""
+    env = dict(os.environ, PYTHONIOENCODING="utf-8")
+    for mode, flags in (("headless", ["--headless"]), ("gui", [])):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--exit-when-ready", *flags],
+            capture_output=True, text=True, encoding="utf-8", errors="replace", env=env)
+        print(f"\n{mode}: exit code {result.returncode}, {time.perf_counter() - started:.2f}s until exit")
+        for line in result.stdout.splitlines():
+            if line.startswith(("Startup:", "Deferred imports:")):
+                print("  " + line)
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        if result.returncode and errors:
+            print(f"  {errors[-1]}")
+        print(summarize_import_times(result.stderr))
+
+
+# PET STATE INDICATOR
+# Workers publish into the UI event queue; only render_ui_events (on the Tk thread) touches widgets
+
+INDICATOR_STYLES = {  # what the pet shows -> (indicator glyph, colour, animation interval ms)
+    "idle": (None, None, 200),
+    "wake": ("●", "gold", 120),
+    "listening": ("●", "limegreen", 120),
+    "processing": ("◌", "dodgerblue", 80),
+    "speaking": ("♪", "mediumpurple", 150),
+    "paused": ("❚❚", "gray", 400),
+    "error": ("✖", "red", 200),
+}
+STATE_INDICATORS = {
+    ListeningState.IDLE: "idle",
+    ListeningState.WAKE_WORD_DETECTED: "wake",
+    ListeningState.LISTENING_FOR_COMMAND: "listening",
+    ListeningState.PROCESSING: "processing",
+    ListeningState.PAUSED: "paused",
+}
+
+
+# APPLICATION
+class PixelPetApp:
+    """The whole assistant: voice pipeline, commands and (unless headless) the pet window
+    
+    Creating the object has no side effects; start() builds and starts the
+    components and run() blocks until quit. Headless mode skips Tk and the
+    assets entirely, for running as a background service. With the pet, the
+    window is drawn first and the voice stack loads behind it.
+    """
+    
+    def __init__(self, headless=False, app_dir=application_path, exit_when_ready=False):
+        self.headless = headless
+        self.app_dir = app_dir
+        self.exit_when_ready = exit_when_ready  # startup benchmark: quit as soon as listening
+        self.startup_times = {}  # phase -> seconds (window and total count from process start)
+        self.stopped = threading.Event()
+        self.core = None
+        self.root = None
+        self.chat_window = None
+        self.tts_manager = None
+        self.voice_assistant = None
+        self.exit_deadline = None  # set by shutdown(); main() exits by then whatever is still running
+    
+    def start(self):
+        """Build and start everything; returns False if the pet window can't be created"""
+        started = time.perf_counter()
+        self.startup_times["imports"] = _module_loaded - _module_started
+        print("="*50)
+        print("PIXEL PET - FIXED VERSION" + (" (headless)" if self.headless else ""))
+        print("="*50)
+        print("All critical bugs resolved!")
+        print("="*50 + "\n")
+        
+        self.core = AsyncCore()
+        self.core.start()
+        if self.headless:
+            self._start_voice()
+            self._voice_ready(started)
+            return True
+        
+        if not self._build_gui():
+            self.shutdown()
+            return False
+        self.root.update()  # first frame on screen before the voice stack is imported
+        self.startup_times["window"] = self.startup_times["imports"] + time.perf_counter() - started
+        threading.Thread(target=self._load_voice, args=(started,), name="voice-startup", daemon=True).start()
+        return True
+    
+    def _load_voice(self, started):
+        """Voice startup behind the pet window - Tk keeps animating meanwhile"""
+        try:
+            self._start_voice()
+        except Exception as e:
+            print(f" Voice startup failed: {e}")
+            return
+        self.bridge.call(self._voice_ready, started)
+    
+    def _start_voice(self):
+        """Voice pipeline and command processing - everything headless mode needs"""
+        voice_started = time.perf_counter()
+        import_voice_stack()
+        self.tts_manager = TTSManager(os.path.join(self.app_dir, PHRASE_CACHE_DIR))
+        self.mic_manager = MicrophoneManager()
+        self.state_manager = StateManager()
+        self.command_processor = CommandProcessor(self.tts_manager, data_dir=self.app_dir)
+        self.voice_assistant = VoiceAssistant(self.tts_manager, self.mic_manager, self.state_manager,
+                                              self.command_processor, self.core)
+        
+        self.startup_times["voice"] = time.perf_counter() - voice_started
+        
+        # Random startup greeting
+        startup_greeting = random.choice(STARTUP_GREETINGS)
+        print(startup_greeting)
+        self.tts_manager.speak(startup_greeting, priority=SPEECH_PRIORITY_LOW)
+    
+    def _voice_ready(self, started):
+        """Hook the voice components up to the pet and start listening (Tk thread with the pet)"""
+        if self.stopped.is_set():
+            return
+        if self.root is not None:
+            self.state_manager.subscribe(lambda old_state, new_state, dwell: self.ui_events.publish("state", new_state))
+            self.tts_manager.on_speaking = lambda speaking: self.ui_events.publish("speaking", speaking)
+            self.voice_assistant.on_event = self.ui_events.publish
+            self.root.bind("t", self.bridge.handler(self.show_time))
+            self.root.bind("T", self.bridge.handler(self.show_time))
+            self.root.bind("b", self.bridge.handler(self.toggle_background_listening))
+            self.root.bind("B", self.bridge.handler(self.toggle_background_listening))
+        
+        # Start background listener
+        self.voice_assistant.start_background_listener()
+        self.startup_times["total"] = self.startup_times["imports"] + time.perf_counter() - started
+        self._print_ready()
+        if self.exit_when_ready:
+            self.quit_pet()
+            return
+        
+        # Warm the command plugins (pyautogui, webbrowser, ...) so the first command doesn't pay for them
+        threading.Thread(target=self.command_processor.registry.preload, name="plugin-preload", daemon=True).start()
+    
+    def _build_gui(self):
+        # CREATE GUI WINDOW
+        import_gui_toolkit()
+        root = self.root = tk.Tk()
+        root.overrideredirect(True)
+        root.attributes("-topmost", True)
+        root.wm_attributes("-transparentcolor", "white")
+        self.bridge = TkBridge(root, self.core)
+        self.bridge.start()
+        
+        # LOAD ANIMATION FRAMES
+        self.frames = []
+        assets_path = os.path.join(self.app_dir, "assets")
+        print(f"\nLooking for images in: {assets_path}")
+        
+        try:
+            for i in range(1, 9):
+                img_path = os.path.join(assets_path, f"Didle{i}.png")
+                if os.path.exists(img_path):
+                    self.frames.append(tk.PhotoImage(file=img_path))  # Tk reads PNG itself - no PIL on the startup path
+                    print(f"  ✓ Loaded Didle{i}.png")
+                else:
+                    print(f"    Didle{i}.png not found")
+            
+            if len(self.frames) == 0:
+                raise Exception("No animation frames found in assets folder!")
+            
+            print(f"\n✓ Loaded {len(self.frames)} frames successfully\n")
+        
+        except Exception as e:
+            print(f"\n Error: {e}")
+            print("Make sure you have an 'assets' folder with Didle1.png to Didle8.png")
+            root.destroy()
+            self.root = None
+            return False
+        
+        self.current_frame = 0
+        self.label = tk.Label(root, image=self.frames[0], bg="white")
+        self.label.pack()
+        
+        # State indicator drawn over the pet (white is the transparent colour)
+        self.indicator = tk.Label(root, text="●", fg="white", bg="white", font=("Arial", 14, "bold"))
+        
+        # SPAWN AT BOTTOM RIGHT
+        root.update_idletasks()
+        x = root.winfo_screenwidth() - root.winfo_width() - 15
+        y = root.winfo_screenheight() - root.winfo_height() - 57
+        root.geometry(f"+{x}+{y}")
+        
+        print(f"Window position: x={x}, y={y}")
+        print(f"Window size: {root.winfo_width()}x{root.winfo_height()}\n")
+        
+        self.animation_interval = 200
+        self.animate()
+        
+        # DRAG VARIABLES
+        self.x_offset = 0
+        self.y_offset = 0
+        self.label.bind("<Button-1>", self.start_move)
+        self.label.bind("<B1-Motion>", self.do_move)
+        
+        # UI events from worker threads (hooked up in _voice_ready)
+        self.ui_events = UIEventQueue()
+        self.pet_status = {"state": ListeningState.IDLE, "speaking": False, "error_until": 0.0, "shown": None}
+        self.render_ui_events()
+        
+        # Bind keyboard shortcuts - T and B follow once the voice stack is up
+        self.label.bind("<Double-Button-1>", self.open_chat)
+        root.bind("c", self.open_chat)
+        root.bind("C", self.open_chat)
+        self.label.bind("<Button-3>", self.quit_pet)
+        return True
+    
+    # ANIMATE 
+    def animate(self):
+        if self.frames:
+            self.current_frame = (self.current_frame + 1) % len(self.frames)
+            self.label.config(image=self.frames[self.current_frame])
+        self.root.after(self.animation_interval, self.animate)
+    
+    def start_move(self, event):
+        self.x_offset = event.x
+        self.y_offset = event.y
+    
+    def do_move(self, event):
+        x = event.x_root - self.x_offset
+        y = event.y_root - self.y_offset
+        self.root.geometry(f"+{x}+{y}")
+    
+    # INFO WINDOW
+    def open_chat(self, event=None):
+        """Open info/chat window"""
+        from tkinter import scrolledtext
+        
+        if self.chat_window and self.chat_window.winfo_exists():
+            self.chat_window.lift()
+            return
+        
+        chat_window = self.chat_window = tk.Toplevel(self.root)
+        chat_window.title("Pixel")
+        chat_window.geometry("450x400")
+        
+        info_text = scrolledtext.ScrolledText(chat_window, wrap=tk.WORD, width=50, height=20)
+        info_text.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        
+        info_text.insert(tk.END, "PIXEL PET\n\n", "title")
+        info_text.insert(tk.END, " All Critical Bugs Fixed!\n\n", "success")
+        
+        info_text.insert(tk.END, "What's Fixed:\n", "header")
+        info_text.insert(tk.END, "• Thread-safe TTS (no more crashes)\n", "normal")
+        info_text.insert(tk.END, "• Microphone locking (no conflicts)\n", "normal")
+        info_text.insert(tk.END, "• State management (no race conditions)\n", "normal")
+        info_text.insert(tk.END, "• Proper error handling\n\n", "normal")
+        
+        info_text.insert(tk.END, "Voice Commands:\n", "header")
+        info_text.insert(tk.END, "• 'Hey pixel open YouTube'\n", "cmd")
+        info_text.insert(tk.END, "• 'Hey pixel what time is it'\n", "cmd")
+        info_text.insert(tk.END, "• 'Hey pixel volume up/down'\n", "cmd")
+        info_text.insert(tk.END, "• 'Hey pixel mute'\n", "cmd")
+        info_text.insert(tk.END, "• 'Hey pixel screenshot'\n", "cmd")
+        info_text.insert(tk.END, "• 'Hey pixel minimize'\n\n", "cmd")
+        
+        info_text.insert(tk.END, "Keyboard Shortcuts:\n", "header")
+        info_text.insert(tk.END, "• C - Open this info window\n", "normal")
+        info_text.insert(tk.END, "• T - Show current time\n", "normal")
+        info_text.insert(tk.END, "• B - Toggle background listening\n", "normal")
+        info_text.insert(tk.END, "• Right-click - Quit\n\n", "normal")
+        
+        info_text.insert(tk.END, "Note: This version has NO AI chat.\n", "normal")
+        info_text.insert(tk.END, "For AI features, add Gemini API key.\n", "normal")
+        
+        info_text.tag_config("title", foreground="blue", font=("Arial", 14, "bold"))
+        info_text.tag_config("success", foreground="green", font=("Arial", 12, "bold"))
+        info_text.tag_config("header", foreground="purple", font=("Arial", 11, "bold"))
+        info_text.tag_config("cmd", foreground="darkgreen")
+        info_text.tag_config("normal", foreground="black")
+        
+        info_text.config(state='disabled')
+        self.show_state(self.pet_status["state"])
+    
+    def show_state(self, state):
+        """Reflect the assistant state in the info window title (Tk thread only)"""
+        if self.chat_window and self.chat_window.winfo_exists():
+            self.chat_window.title(f"Pixel - {state.name.replace('_', ' ').lower()}")
+    
+    def render_ui_events(self):
+        """Apply queued events once per frame - coalesced, so only the latest state is drawn"""
+        frame_started = time.perf_counter()
+        events = self.ui_events.drain()
+        status = self.pet_status
+        for event in events:
+            if event.kind == "state":
+                status["state"] = event.detail
+            elif event.kind == "speaking":
+                status["speaking"] = event.detail
+            elif event.kind == "error":
+                status["error_until"] = time.monotonic() + UI_ERROR_FLASH_MS / 1000
+        
+        if time.monotonic() < status["error_until"]:
+            shown = "error"
+        elif status["speaking"]:
+            shown = "speaking"
+        else:
+            shown = STATE_INDICATORS[status["state"]]
+        
+        if shown != status["shown"]:
+            status["shown"] = shown
+            glyph, colour, self.animation_interval = INDICATOR_STYLES[shown]
+            if glyph:
+                self.indicator.config(text=glyph, fg=colour)
+                self.indicator.place(relx=1.0, rely=0.0, anchor="ne")
+            else:
+                self.indicator.place_forget()
+        
+        if events:
+            self.show_state(status["state"])
+            self.root.update_idletasks()  # draw now so the latency covers real pixels
+            self.ui_events.rendered(events, frame_started)
+        self.root.after(UI_FRAME_MS, self.render_ui_events)
+    
+    # KEYBOARD SHORTCUTS - NOW IMPLEMENTED
+    async def show_time(self, event=None):
+        """Show current time (T key)"""
+        current_time = time.strftime("%I:%M %p")
+        self.tts_manager.speak(time_words(), key="time")
+        print(f" Time: {current_time}")
+    
+    async def toggle_background_listening(self, event=None):
+        """Toggle background listening on/off (B key)"""
+        if self.state_manager.set_state(ListeningState.IDLE, expected=ListeningState.PAUSED):
+            self.tts_manager.speak("LISTENING RESUMED", key="listening")
+            print("▶  Background listening resumed")
+        else:
+            self.state_manager.set_state(ListeningState.PAUSED)
+            self.tts_manager.speak("LISTENING PAUSED", key="listening")
+            print("⏸  Background listening paused")
+    
+    def _print_ready(self):
+        # STARTUP MESSAGE
+        print("="*50)
+        print(" PIXEL PET READY!")
+        print("="*50)
+        if not self.headless:
+            print("Controls:")
+            print("  Double-click → Info window")
+            print("  Press 'C' → Info window")
+            print("  Press 'T' → Show time")
+            print("  Press 'B' → Toggle listening")
+            print("  Right-click → Quit")
         else:
-            print(f"    Didle{i}.png not found")
-    
-    if len(frames) == 0:
-        raise Exception("No animation frames found in assets folder!")
-        
-    print(f"\n✓ Loaded {len(frames)} frames successfully\n")
+            print("Headless - press Ctrl+C to quit")
+        print("  Say wake word → Voice command")
+        print("="*50)
+        print(f"Wake words: {', '.join(WAKE_WORDS)}")
+        print("Startup: " + ", ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in self.startup_times.items()))
+        print("Deferred imports: " + ", ".join(f"{module} {seconds * 1000:.0f}ms"
+                                                for module, seconds in DEFERRED_IMPORT_TIMES.items()))
+        print("="*50 + "\n")
     
-except Exception as e:
-    print(f"\n Error: {e}")
-    print("Make sure you have an 'assets' folder with Didle1.png to Didle8.png")
-    root.destroy()
-    sys.exit(1)
+    def run(self):
+        """Block until quit"""
+        # RUN GUI
+        try:
+            if self.headless:
+                # wait() with a timeout so Ctrl+C still gets through on Windows
+                while not self.stopped.wait(1.0):
+                    pass
+            else:
+                self.root.mainloop()
+        except KeyboardInterrupt:
+            print("\n  Interrupted by user")
+            self.quit_pet()
+    
+    def shutdown(self):
+        """Cancel every task, then shut components down - bounded by SHUTDOWN_TIMEOUT"""
+        if self.core is None:
+            return
+        self.exit_deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        if self.root is not None:
+            self.bridge.stop()
+        self.core.shutdown(self._shutdown_components)
+        self.core = None
+    
+    def _shutdown_components(self):
+        if self.voice_assistant is not None:  # None if quit before the voice stack finished loading
+            self.voice_assistant.shutdown()
+        if self.tts_manager is not None:
+            self.tts_manager.shutdown()
+    
+    def quit_pet(self, event=None):
+        """Quit the application gracefully"""
+        if self.stopped.is_set():
+            return
+        print("\n" + "="*50)
+        print("Shutting down Pixel Pet...")
+        print("="*50)
+        
+        started = time.monotonic()
+        self.shutdown()
+        if self.root is not None:
+            print(self.ui_events.report())
+        print(f" Shutdown took {time.monotonic() - started:.2f}s")
+        self.stopped.set()
+        
+        # Destroy GUI
+        if self.root is not None:
+            self.root.destroy()
+        print(" Goodbye!")
+
+
+_module_loaded = time.perf_counter()
 
-current_frame = 0
-label = tk.Label(root, image=frames[0], bg="white")
-label.pack()
 
-# SPAWN AT BOTTOM RIGHT
-root.update_idletasks()
-x = root.winfo_screenwidth() - root.winfo_width() - 15
-y = root.winfo_screenheight() - root.winfo_height() - 57
-root.geometry(f"+{x}+{y}")
-
-print(f"Window position: x={x}, y={y}")
-print(f"Window size: {root.winfo_width()}x{root.winfo_height()}\n")
-
-# ANIMATE 
-def animate():
-    global current_frame
-    if frames:
-        current_frame = (current_frame + 1) % len(frames)
-        label.config(image=frames[current_frame])
-    root.after(200, animate)  
-
-animate()
-
-# DRAG VARIABLES
-x_offset = 0
-y_offset = 0
-
-def start_move(event):
-    global x_offset, y_offset
-    x_offset = event.x
-    y_offset = event.y
-
-def do_move(event):
-    x = event.x_root - x_offset
-    y = event.y_root - y_offset
-    root.geometry(f"+{x}+{y}")
-
-label.bind("<Button-1>", start_move)
-label.bind("<B1-Motion>", do_move)
-
-
-# INFO WINDOW
-
-chat_window = None
-
-def open_chat(event=None):
-    """Open info/chat window"""
-    global chat_window
-    if chat_window and chat_window.winfo_exists():
-        chat_window.lift()
-        return
-    
-    chat_window = tk.Toplevel(root)
-    chat_window.title("Pixel")
-    chat_window.geometry("450x400")
-    
-    info_text = scrolledtext.ScrolledText(chat_window, wrap=tk.WORD, width=50, height=20)
-    info_text.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
-    
-    info_text.insert(tk.END, "PIXEL PET\n\n", "title")
-    info_text.insert(tk.END, " All Critical Bugs Fixed!\n\n", "success")
-    
-    info_text.insert(tk.END, "What's Fixed:\n", "header")
-    info_text.insert(tk.END, "• Thread-safe TTS (no more crashes)\n", "normal")
-    info_text.insert(tk.END, "• Microphone locking (no conflicts)\n", "normal")
-    info_text.insert(tk.END, "• State management (no race conditions)\n", "normal")
-    info_text.insert(tk.END, "• Proper error handling\n\n", "normal")
-    
-    info_text.insert(tk.END, "Voice Commands:\n", "header")
-    info_text.insert(tk.END, "• 'Hey pixel open YouTube'\n", "cmd")
-    info_text.insert(tk.END, "• 'Hey pixel what time is it'\n", "cmd")
-    info_text.insert(tk.END, "• 'Hey pixel volume up/down'\n", "cmd")
-    info_text.insert(tk.END, "• 'Hey pixel mute'\n", "cmd")
-    info_text.insert(tk.END, "• 'Hey pixel screenshot'\n", "cmd")
-    info_text.insert(tk.END, "• 'Hey pixel minimize'\n\n", "cmd")
-    
-    info_text.insert(tk.END, "Keyboard Shortcuts:\n", "header")
-    info_text.insert(tk.END, "• C - Open this info window\n", "normal")
-    info_text.insert(tk.END, "• T - Show current time\n", "normal")
-    info_text.insert(tk.END, "• B - Toggle background listening\n", "normal")
-    info_text.insert(tk.END, "• Right-click - Quit\n\n", "normal")
-    
-    info_text.insert(tk.END, "Note: This version has NO AI chat.\n", "normal")
-    info_text.insert(tk.END, "For AI features, add Gemini API key.\n", "normal")
-    
-    info_text.tag_config("title", foreground="blue", font=("Arial", 14, "bold"))
-    info_text.tag_config("success", foreground="green", font=("Arial", 12, "bold"))
-    info_text.tag_config("header", foreground="purple", font=("Arial", 11, "bold"))
-    info_text.tag_config("cmd", foreground="darkgreen")
-    info_text.tag_config("normal", foreground="black")
-    
-    info_text.config(state='disabled')
-
-
-# KEYBOARD SHORTCUTS - NOW IMPLEMENTED
-
-def show_time(event=None):
-    """Show current time (T key)"""
-    current_time = time.strftime("%I:%M %p")
-    tts_manager.speak(f"THE TIME IS {current_time}")
-    print(f" Time: {current_time}")
-
-def toggle_background_listening(event=None):
-    """Toggle background listening on/off (B key)"""
-    if state_manager.get_state() == ListeningState.IDLE:
-        tts_manager.speak("LISTENING PAUSED")
-        state_manager.set_state(ListeningState.SPEAKING)  # Prevents listening
-        print("⏸  Background listening paused")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pixel Pet desktop assistant")
+    parser.add_argument("--headless", action="store_true",
+                        help="run only the voice pipeline and commands, without the pet window")
+    parser.add_argument("--wake-word-report", nargs="?", metavar="SAMPLES_DIR",
+                        const=os.path.join(application_path, "wake_word_samples"),
+                        help="measure wake word false accept / reject rates on labelled WAVs")
+    parser.add_argument("--compare-recognizers", nargs="+", metavar="ARG",
+                        help="SAMPLES_DIR [google,sphinx,vosk]: compare recognizer latency and WER")
+    parser.add_argument("--benchmark-intents", action="store_true",
+                        help="time intent routing as the grammar grows")
+    parser.add_argument("--startup-benchmark", action="store_true",
+                        help="cold-start both modes and break startup down by import")
+    parser.add_argument("--exit-when-ready", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    
+    # OFFLINE REPORTS
+    if args.wake_word_report:
+        run_wake_word_report(args.wake_word_report)
+        return 0
+    if args.compare_recognizers:
+        samples_dir, *rest = args.compare_recognizers
+        run_recognizer_comparison(samples_dir, rest[0].split(",") if rest else ["google", "sphinx", "vosk"])
+        return 0
+    if args.benchmark_intents:
+        run_intent_benchmark()
+        return 0
+    if args.startup_benchmark:
+        run_startup_benchmark()
+        return 0
+    
+    app = PixelPetApp(headless=args.headless, exit_when_ready=args.exit_when_ready)
+    code = 0
+    if app.start():
+        app.run()
     else:
-        state_manager.set_state(ListeningState.IDLE)
-        tts_manager.speak("LISTENING RESUMED")
-        print("▶  Background listening resumed")
-
-def quit_pet(event=None):
-    """Quit the application gracefully"""
-    print("\n" + "="*50)
-    print("Shutting down Pixel Pet...")
-    print("="*50)
-    
-    # Shutdown components
-    voice_assistant.shutdown()
-    tts_manager.shutdown()
-    
-    # Destroy GUI
-    root.destroy()
-    print(" Goodbye!")
-
-# Bind keyboard shortcuts
-label.bind("<Double-Button-1>", open_chat)
-root.bind("c", open_chat)
-root.bind("C", open_chat)
-root.bind("t", show_time)
-root.bind("T", show_time)
-root.bind("b", toggle_background_listening)
-root.bind("B", toggle_background_listening)
-label.bind("<Button-3>", quit_pet)
-
-
-# START VOICE ASSISTANT
-
-# Start background listener
-voice_assistant.start_background_listener()
-
-# STARTUP MESSAGE
-
-
-print("="*50)
-print(" PIXEL PET READY!")
-print("="*50)
-print("Controls:")
-print("  Double-click → Info window")
-print("  Press 'C' → Info window")
-print("  Press 'T' → Show time")
-print("  Press 'B' → Toggle listening")
-print("  Right-click → Quit")
-print("  Say wake word → Voice command")
-print("="*50)
-print(f"Wake words: {', '.join(WAKE_WORDS)}")
-print("="*50 + "\n")
-
-# RUN GUI
-
-try:
-    root.mainloop()
-except KeyboardInterrupt:
-    print("\n  Interrupted by user")
-    quit_pet()
\ No newline at end of file
+        code = 1
+    exit_within_deadline(app.exit_deadline or time.monotonic(), code)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
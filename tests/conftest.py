@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402 - importing main has no side effects
+
+
+@pytest.fixture
+def sr(monkeypatch):
+    """speech_recognition bound into main, as import_voice_stack() would"""
+    module = pytest.importorskip("speech_recognition")
+    monkeypatch.setattr(main, "sr", module)
+    return module
+
+
+@pytest.fixture
+def recognizer(sr):
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = main.ENERGY_THRESHOLD
+    return recognizer
@@ -0,0 +1,45 @@
+import threading
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def core():
+    core = main.AsyncCore()
+    core.start()
+    yield core
+    core.shutdown(lambda: None, timeout=1.0)
+
+
+def test_results_and_timeouts(core):
+    actions = main.ActionExecutor(core, workers=2, queue_limit=2)
+    try:
+        assert actions.submit("ok", lambda: True).result(2).status == "ok"
+        assert actions.submit("failed", lambda: False).result(2).status == "failed"
+        assert actions.submit("slow", time.sleep, 0.5, timeout=0.1).result(2).status == "timeout"
+    finally:
+        actions.shutdown()
+
+
+def test_queue_wait_has_its_own_limit(core, monkeypatch):
+    monkeypatch.setattr(main, "ACTION_QUEUE_TIMEOUT", 0.2)
+    release = threading.Event()
+    actions = main.ActionExecutor(core, workers=1, queue_limit=1)
+    try:
+        stuck = actions.submit("stuck", release.wait, timeout=0.1)
+        queued = actions.submit("queued", lambda: True)
+        assert actions.submit("refused", lambda: True) is None
+        
+        result = queued.result(2)
+        assert result.status == "timeout"
+        assert isinstance(result.error, TimeoutError)
+        assert stuck.result(2).status == "timeout"
+        
+        # The dropped action gave its slot back
+        assert actions.submit("next", lambda: True) is not None
+    finally:
+        release.set()
+        actions.shutdown()
@@ -0,0 +1,51 @@
+import pytest
+
+import main
+
+
+class FailingBackend(main.FakeBackend):
+    name = "failing"
+    
+    def transcribe(self, audio):
+        raise main.sr.UnknownValueError()
+
+
+def test_unknown_backend_name_is_rejected(recognizer):
+    with pytest.raises(ValueError, match="Unknown recognizer backend 'whisper'"):
+        main.create_recognizer_backend("whisper", recognizer)
+
+
+def test_known_backend_names_are_created(recognizer):
+    backend = main.create_recognizer_backend("fake", recognizer)
+    assert isinstance(backend, main.FakeBackend)
+    assert backend.name == "fake"
+
+
+@pytest.mark.parametrize("reference, hypothesis, expected", [
+    ("open youtube", "open youtube", 0.0),
+    ("Open YouTube", "open youtube", 0.0),
+    ("open youtube", "open you tube", 1.0),
+    ("take a screenshot", "take screenshot", 1 / 3),
+    ("what time is it", "", 1.0),
+    ("", "", 0.0),
+])
+def test_word_error_rate(reference, hypothesis, expected):
+    assert main.word_error_rate(reference, hypothesis) == pytest.approx(expected)
+
+
+def test_compare_recognizer_backends(sr, recognizer):
+    first, second = sr.AudioData(bytes(320), 16000, 2), sr.AudioData(bytes(640), 16000, 2)
+    samples = [(first, "open youtube"), (second, "what time is it")]
+    exact = main.FakeBackend(recognizer)
+    exact.add(first, "open youtube")
+    exact.add(second, "what time is it")
+    sloppy = main.FakeBackend(recognizer, ["open you tube"])
+    sloppy.name = "sloppy"
+    deaf = FailingBackend(recognizer)
+    
+    results = main.compare_recognizer_backends(samples, [exact, sloppy, deaf])
+    
+    assert results["fake"]["wer"] == 0.0
+    assert results["fake"]["failures"] == 0
+    assert results["sloppy"]["wer"] == pytest.approx((1.0 + 1.0) / 2)
+    assert results["failing"] == {"latency": pytest.approx(0.0, abs=0.1), "wer": 1.0, "failures": 2}
@@ -0,0 +1,73 @@
+import main
+
+CHUNK_SECONDS = 1024 / 16000
+
+
+def play(reference, seconds, energy):
+    """Steady playback; returns the capture timestamps covering it"""
+    times = [i * CHUNK_SECONDS for i in range(int(seconds / CHUNK_SECONDS))]
+    for played_at in times:
+        reference.add(played_at, energy)
+    return times
+
+
+def test_echo_is_suppressed_and_coupling_learned():
+    reference = main.EchoReference()
+    echo = main.EchoSuppressor(reference)
+    for captured_at in play(reference, 3.0, 1000):
+        assert echo.is_echo(400, main.ENERGY_THRESHOLD, captured_at)
+    assert 0.35 < echo.coupling < 0.45
+
+
+def test_barge_in_passes_for_the_whole_utterance():
+    reference = main.EchoReference()
+    echo = main.EchoSuppressor(reference)
+    times = play(reference, 3.0, 1000)
+    talking = [captured_at for captured_at in times if captured_at > main.ECHO_ONSET_WINDOW]
+    # The user at six times the expected echo, from their first chance to answer to the end
+    assert not any(echo.is_echo(3000, main.ENERGY_THRESHOLD, captured_at) for captured_at in talking)
+    assert echo.coupling == main.ECHO_INITIAL_COUPLING
+    assert echo.stats["barge_in_chunks"] == len(talking)
+
+
+def test_coupling_above_one_is_learned_at_playback_onset():
+    reference = main.EchoReference()
+    echo = main.EchoSuppressor(reference)
+    # Loud speakers next to the mic: the echo is louder than the playback itself
+    times = play(reference, 3.0, 3000)
+    echoes = [echo.is_echo(3600, main.ENERGY_THRESHOLD, captured_at) for captured_at in times]
+    assert all(echoes)
+    assert echo.stats["barge_in_chunks"] == 0
+    assert 1.1 < echo.coupling < 1.25
+
+
+def test_each_playback_opens_an_onset_window():
+    reference = main.EchoReference()
+    play(reference, 1.0, 1000)
+    reference.add(5.0, 1000)
+    assert reference.in_onset(0.1)
+    assert not reference.in_onset(0.5)
+    assert reference.in_onset(5.1)
+
+
+def test_coupling_is_capped():
+    reference = main.EchoReference()
+    echo = main.EchoSuppressor(reference)
+    for captured_at in play(reference, 10.0, 10):
+        echo.is_echo(250, main.ENERGY_THRESHOLD, captured_at)  # quiet room noise over faint playback
+    assert echo.coupling <= main.ECHO_MAX_COUPLING
+
+
+def test_no_playback_is_never_echo():
+    echo = main.EchoSuppressor(main.EchoReference())
+    assert not echo.is_echo(5000, main.ENERGY_THRESHOLD, 1.0)
+    assert echo.coupling == main.ECHO_INITIAL_COUPLING
+
+
+def test_capture_times_come_from_each_chunk():
+    ring = main.AudioRingBuffer(3)
+    for captured_at in (10.0, 10.064, 10.5, 10.564):  # frames dropped before 10.5
+        ring.append(bytes(2048), captured_at)
+    assert ring.time_of(2) == 10.5
+    assert ring.time_of(3) == 10.564
+    assert ring.time_of(0) == 10.064  # evicted - nearest chunk still held
@@ -0,0 +1,79 @@
+import pytest
+
+import main
+
+
+class FailingBackend(main.FakeBackend):
+    name = "failing"
+    
+    def transcribe(self, audio):
+        self.calls += 1
+        raise main.sr.RequestError("offline")
+
+
+@pytest.fixture
+def audio(sr):
+    return sr.AudioData(bytes(3200), 16000, 2)
+
+
+@pytest.fixture
+def fast_hedge(monkeypatch):
+    monkeypatch.setattr(main, "HEDGE_MIN_DELAY", 0.05)
+
+
+def test_primary_answers_without_hedging(recognizer, audio):
+    hedged = main.HedgedRecognizer(main.FakeBackend(recognizer, ["open youtube"]))
+    try:
+        result = hedged.recognize(audio)
+        assert (result.text, result.backend) == ("open youtube", "fake")
+        assert hedged.stats["hedged"] == 0
+        assert hedged.stats["primary_wins"] == 1
+    finally:
+        hedged.shutdown()
+
+
+def test_slow_primary_is_hedged(recognizer, audio, fast_hedge):
+    primary = main.FakeBackend(recognizer, ["slow"], latency=0.5)
+    fallback = main.FakeBackend(recognizer, ["fast"])
+    hedged = main.HedgedRecognizer(primary, fallback, deadline=2.0)
+    try:
+        assert hedged.recognize(audio).text == "fast"
+        assert hedged.stats["hedged"] == 1
+        assert hedged.stats["hedge_wins"] == 1
+        assert (hedged.stats["cancelled"], hedged.stats["abandoned"]) == (0, 1)  # primary was on the wire
+    finally:
+        hedged.shutdown()
+
+
+def test_failed_primary_hedges_immediately(recognizer, audio):
+    primary = FailingBackend(recognizer)
+    hedged = main.HedgedRecognizer(primary, main.FakeBackend(recognizer, ["volume up"]), deadline=2.0)
+    try:
+        assert hedged.recognize(audio).text == "volume up"  # well before HEDGE_MIN_DELAY * 2
+        assert primary.calls == 1
+        assert hedged.stats["hedge_wins"] == 1
+    finally:
+        hedged.shutdown()
+
+
+def test_deadline_gives_up(recognizer, audio, fast_hedge):
+    slow = main.FakeBackend(recognizer, ["too late"], latency=0.5)
+    hedged = main.HedgedRecognizer(slow, deadline=0.2)
+    try:
+        assert hedged.recognize(audio) is None
+        assert hedged.stats["deadline_exceeded"] == 1
+    finally:
+        hedged.shutdown()
+
+
+def test_queued_loser_is_cancelled_running_one_abandoned(recognizer, audio, fast_hedge):
+    slow = main.FakeBackend(recognizer, ["too late"], latency=0.5)
+    hedged = main.HedgedRecognizer(slow, deadline=0.3)
+    hedged.executor.shutdown()
+    hedged.executor = main.ThreadPoolExecutor(max_workers=1)  # the hedge has to queue behind the primary
+    try:
+        assert hedged.recognize(audio) is None
+        assert hedged.stats["hedged"] == 1
+        assert (hedged.stats["cancelled"], hedged.stats["abandoned"]) == (1, 1)
+    finally:
+        hedged.shutdown()
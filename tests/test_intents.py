@@ -0,0 +1,48 @@
+import pytest
+
+from commands import COMMAND_PLUGINS, CommandPlugin
+
+import main
+
+
+def make_router():
+    registry = main.CommandRegistry(COMMAND_PLUGINS)
+    return main.IntentRouter(registry.grammar(), registry.slots())
+
+
+def test_routes_site_with_slot():
+    match = make_router().route("could you open YouTube please")
+    assert match.intent == "open_site"
+    assert match.slots == {"site": "youtube"}
+
+
+def test_multi_word_slot_value():
+    assert make_router().route("go to chat gpt").slots == {"site": "chat gpt"}
+
+
+def test_anchored_pattern_needs_whole_command():
+    router = make_router()
+    assert router.route("reddit").intent == "open_site"
+    assert router.route("i like reddit") is None
+
+
+def test_longest_match_wins():
+    router = make_router()
+    assert router.route("screenshot").intent == "screenshot"
+    assert router.route("screenshot the window").intent == "window_screenshot"
+    match = router.route("screenshot the left half")
+    assert (match.intent, match.slots) == ("screenshot", {"region": "left half"})
+
+
+def test_whole_words_only():
+    router = make_router()
+    assert router.route("what time is it").intent == "time"
+    assert router.route("sometimes") is None
+    assert router.route("") is None
+
+
+def test_plugins_cannot_redefine_shared_slots():
+    plugins = COMMAND_PLUGINS + [CommandPlugin("bookmark", ["bookmark {site}"], "commands.web", "open_site",
+                                               slots={"site": ["intranet"]})]
+    with pytest.raises(ValueError, match="Plugin bookmark redefines slot 'site'"):
+        main.CommandRegistry(plugins).slots()
@@ -0,0 +1,53 @@
+import types
+
+import pytest
+
+import main
+
+CHUNK_SECONDS = 1024 / 16000
+
+
+def make_tracker(floor):
+    tracker = main.NoiseFloorTracker(types.SimpleNamespace(energy_threshold=main.ENERGY_THRESHOLD))
+    tracker.update(floor, CHUNK_SECONDS)
+    return tracker
+
+
+def feed(tracker, energy, seconds):
+    for _ in range(int(seconds / CHUNK_SECONDS)):
+        threshold = tracker.update(energy, CHUNK_SECONDS)
+    return threshold
+
+
+def test_first_chunk_seeds_the_floor():
+    tracker = make_tracker(100)
+    assert tracker.noise_floor == 100
+    assert tracker.recognizer.energy_threshold == 100 * main.NOISE_THRESHOLD_RATIO
+
+
+def test_floor_rises_slowly_with_louder_ambience():
+    tracker = make_tracker(100)
+    threshold = feed(tracker, 200, main.NOISE_FLOOR_RISE_SECONDS)
+    # One time constant: about 63% of the way there
+    assert 155 < tracker.noise_floor < 170
+    assert threshold == tracker.recognizer.energy_threshold == tracker.noise_floor * main.NOISE_THRESHOLD_RATIO
+
+
+def test_speech_barely_moves_the_floor():
+    fan, speech = make_tracker(100), make_tracker(100)
+    feed(fan, 200, 1.0)
+    feed(speech, 2000, 1.0)  # above the threshold - three times slower
+    fan_share = (fan.noise_floor - 100) / (200 - 100)
+    speech_share = (speech.noise_floor - 100) / (2000 - 100)
+    assert speech_share == pytest.approx(fan_share / 3, rel=0.1)
+
+
+def test_floor_falls_quickly_when_the_room_gets_quiet():
+    tracker = make_tracker(400)
+    feed(tracker, 60, 5 * main.NOISE_FLOOR_FALL_SECONDS)
+    assert tracker.noise_floor == pytest.approx(60, abs=5)
+
+
+def test_threshold_never_drops_below_the_minimum():
+    tracker = make_tracker(0)
+    assert feed(tracker, 0, 1.0) == main.NOISE_THRESHOLD_MIN
@@ -0,0 +1,58 @@
+import os
+import threading
+import types
+import wave
+
+import main
+
+
+class FakeEngine:
+    """pyttsx3 stand-in: save_to_file writes a WAV, finishing it only if complete=True"""
+    
+    def __init__(self, rendered, complete=True):
+        self.rendered = rendered
+        self.complete = complete
+    
+    def save_to_file(self, text, path):
+        with wave.open(path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes(bytes(320))
+        if self.complete:
+            self.rendered.set()
+    
+    def iterate(self):
+        pass
+
+
+def render(tmp_path, complete, monkeypatch):
+    monkeypatch.setattr(main, "SPEECH_RENDER_TIMEOUT", 0.05)
+    tts = types.SimpleNamespace(rendered=threading.Event())
+    path = str(tmp_path / "phrase.wav")
+    try:
+        return main.TTSManager._render(tts, FakeEngine(tts.rendered, complete), "HELLO", path), path
+    except RuntimeError:
+        return None, path
+
+
+def test_completed_render_lands_in_the_cache(tmp_path, monkeypatch):
+    audio, path = render(tmp_path, True, monkeypatch)
+    assert audio[1:] == (16000, 2, 1)
+    assert os.listdir(tmp_path) == ["phrase.wav"]
+
+
+def test_timed_out_render_leaves_nothing_behind(tmp_path, monkeypatch):
+    audio, path = render(tmp_path, False, monkeypatch)
+    assert audio is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_open_clears_interrupted_renders(tmp_path):
+    cache = main.PhraseCache(str(tmp_path), phrases=["HELLO"])
+    cache.open("voice-a")
+    leftover = tmp_path / (main.PHRASE_RENDER_PREFIX + "crashed.wav")
+    leftover.write_bytes(b"RIFF")
+    main.PhraseCache(str(tmp_path), phrases=["HELLO"]).open("voice-a")
+    assert not leftover.exists()
+    assert (tmp_path / "manifest.json").exists()
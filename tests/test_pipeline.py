@@ -0,0 +1,69 @@
+import asyncio
+import types
+
+import main
+
+
+class ScriptedMic:
+    """Stands in for MicrophoneManager: listen() plays back a script of segments / timeouts"""
+    
+    def __init__(self, script):
+        self.script = list(script)
+        self.ring = types.SimpleNamespace(closed=False, live_position=lambda: 0)
+        self.capture = types.SimpleNamespace(ring=self.ring, chunk_size=1024, sample_rate=16000)
+        self.source = types.SimpleNamespace(stream=types.SimpleNamespace(position=0))
+        self.timeouts = []
+    
+    def listen(self, timeout=None):
+        self.timeouts.append(timeout)
+        if not self.script:
+            self.ring.closed = True
+            return None
+        return self.script.pop(0)
+    
+    def recognize(self, audio):
+        return main.RecognitionResult(audio, 1.0, "fake", 0.0, 1.0)
+
+
+class AlwaysFires:
+    def detect(self, audio, extra_keywords=()):
+        return main.WakeWordDecision(True, 1.0, "test", 0.0)
+
+
+def segment(text):
+    return main.SpeechSegment(audio=text, start=0.0, end=1.0, start_position=0, end_position=16)
+
+
+def run_pipeline(script, speaking):
+    mic = ScriptedMic(script)
+    pipeline = main.SpeechPipeline(mic, AlwaysFires(), is_listening=lambda: True,
+                                   is_speaking=lambda: speaking, on_barge_in=lambda item, result: None)
+    
+    async def collect():
+        pipeline.start()
+        items = []
+        while (item := await pipeline.next_item()) is not None:
+            items.append((item.kind, item.future.result().text if item.future else None))
+        return items
+    
+    try:
+        return asyncio.run(collect()), mic.timeouts
+    finally:
+        pipeline.shutdown()
+
+
+def test_wake_opens_follow_up_window():
+    items, timeouts = run_pipeline([segment("hey pixel"), segment("open youtube")], speaking=False)
+    assert items == [("wake", "hey pixel"), ("follow_up", "open youtube")]
+    assert timeouts[:2] == [None, main.LISTEN_TIMEOUT]
+
+
+def test_barge_in_wake_word_opens_follow_up_window():
+    items, timeouts = run_pipeline([segment("hey pixel"), segment("volume up")], speaking=True)
+    assert items == [("barge_in", "hey pixel"), ("follow_up", "volume up")]
+    assert timeouts[1] == main.LISTEN_TIMEOUT
+
+
+def test_silence_after_wake_word_times_out():
+    items, _ = run_pipeline([segment("hey pixel"), None], speaking=False)
+    assert items == [("wake", "hey pixel"), ("timeout", None)]
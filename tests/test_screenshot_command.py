@@ -0,0 +1,50 @@
+import types
+from concurrent.futures import Future
+
+import pytest
+
+import main
+from commands import COMMAND_PLUGINS, screenshot
+
+
+class RecordingTTS:
+    def __init__(self):
+        self.spoken = []
+        self.earcons = []
+    
+    def speak(self, text, priority=main.SPEECH_PRIORITY_NORMAL, key=None):
+        self.spoken.append(text)
+    
+    def play_earcon(self, name):
+        self.earcons.append(name)
+
+
+@pytest.fixture
+def make_context(monkeypatch):
+    def make():
+        saved = Future()
+        shots = types.SimpleNamespace(capture=lambda region=None, window=False: screenshot.Screenshot(None, 0.0, saved))
+        monkeypatch.setattr(screenshot, "_pipeline", shots)
+        return types.SimpleNamespace(tts=RecordingTTS(), high_priority=main.SPEECH_PRIORITY_HIGH), saved
+    return make
+
+
+def test_failed_save_is_announced(make_context):
+    context, saved = make_context()
+    assert screenshot.take_screenshot(context)
+    saved.set_exception(OSError("No space left on device"))
+    assert context.tts.spoken == ["SCREENSHOT TAKEN", "SCREENSHOT FAILED"]
+    assert context.tts.earcons == ["error"]
+
+
+def test_successful_save_says_nothing_more(make_context):
+    context, saved = make_context()
+    screenshot.take_screenshot(context)
+    saved.set_result("screenshot.png")
+    assert context.tts.spoken == ["SCREENSHOT TAKEN"]
+    assert context.tts.earcons == []
+
+
+def test_declared_regions_can_be_captured():
+    declared = next(plugin.slots["region"] for plugin in COMMAND_PLUGINS if plugin.name == "screenshot")
+    assert sorted(declared) == sorted(screenshot.SCREEN_REGIONS)
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HUNG_ACTION = textwrap.dedent(f"""
+    import sys, time
+    sys.path.insert(0, {ROOT!r})
+    import main
+    
+    core = main.AsyncCore()
+    core.start()
+    actions = main.ActionExecutor(core)
+    actions.submit("hang", time.sleep, 30, timeout=60)
+    time.sleep(0.2)
+    deadline = time.monotonic() + 1.0
+    core.shutdown(actions.shutdown, timeout=1.0)
+    main.exit_within_deadline(deadline)
+    print("not reached")
+""")
+
+
+def test_hung_action_does_not_block_exit():
+    started = time.monotonic()
+    result = subprocess.run([sys.executable, "-c", HUNG_ACTION], capture_output=True, text=True, timeout=25)
+    assert time.monotonic() - started < 10
+    assert result.returncode == 0
+    assert "Abandoning 1 busy thread(s): action_0" in result.stdout
+    assert "not reached" not in result.stdout
+
+
+def test_clean_shutdown_returns_normally():
+    script = HUNG_ACTION.replace('actions.submit("hang", time.sleep, 30, timeout=60)',
+                                 'actions.submit("quick", time.sleep, 0.1)').replace("not reached", "reached")
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=25)
+    assert result.returncode == 0
+    assert "reached" in result.stdout
+    assert "Abandoning" not in result.stdout
+
+
+def test_failed_task_is_reported(capsys):
+    import main
+    
+    async def listener():
+        raise KeyError("state")
+    
+    core = main.AsyncCore()
+    core.start()
+    try:
+        future = core.spawn(listener())
+        assert isinstance(future.exception(timeout=2.0), KeyError)
+        out, deadline = "", time.monotonic() + 2.0
+        while "failed" not in out and time.monotonic() < deadline:
+            time.sleep(0.01)
+            out += capsys.readouterr().out
+        assert "Task test_failed_task_is_reported.<locals>.listener failed: KeyError: 'state'" in out
+    finally:
+        core.shutdown(lambda: None, timeout=1.0)
@@ -0,0 +1,125 @@
+import time
+
+import main
+
+
+def drain(queue):
+    items = []
+    while True:
+        item = queue.get(timeout=0)
+        if item is None:
+            return items
+        items.append(item)
+
+
+def test_priority_then_fifo():
+    queue = main.SpeechQueue()
+    queue.put(main.SpeechItem("low", priority=main.SPEECH_PRIORITY_LOW))
+    queue.put(main.SpeechItem("first", priority=main.SPEECH_PRIORITY_NORMAL))
+    queue.put(main.SpeechItem("second", priority=main.SPEECH_PRIORITY_NORMAL))
+    queue.put(main.SpeechItem("urgent", priority=main.SPEECH_PRIORITY_HIGH))
+    assert [item.text for item in drain(queue)] == ["urgent", "first", "second", "low"]
+
+
+def test_duplicates_coalesce_keeping_the_higher_priority():
+    queue = main.SpeechQueue()
+    first = main.SpeechItem("VOLUME UP", priority=main.SPEECH_PRIORITY_HIGH)
+    queue.put(first)
+    queue.put(main.SpeechItem("other", priority=main.SPEECH_PRIORITY_NORMAL))
+    queue.put(main.SpeechItem("VOLUME UP", priority=main.SPEECH_PRIORITY_LOW))
+    assert first.handle.wait(0) == "coalesced"
+    items = drain(queue)
+    assert [item.text for item in items] == ["VOLUME UP", "other"]
+    assert items[0].priority == main.SPEECH_PRIORITY_HIGH
+    assert queue.stats["duplicates"] == 1
+
+
+def test_same_key_supersedes():
+    queue = main.SpeechQueue()
+    old = main.SpeechItem("LISTENING PAUSED", key="listening")
+    queue.put(old)
+    queue.put(main.SpeechItem("LISTENING RESUMED", key="listening"))
+    assert old.handle.wait(0) == "superseded"
+    assert [item.text for item in drain(queue)] == ["LISTENING RESUMED"]
+
+
+def test_expired_items_are_skipped():
+    queue = main.SpeechQueue()
+    stale = main.SpeechItem("stale", ttl=0.01)
+    queue.put(stale)
+    queue.put(main.SpeechItem("fresh"))
+    time.sleep(0.03)
+    assert [item.text for item in drain(queue)] == ["fresh"]
+    assert stale.handle.wait(0) == "expired"
+    assert not stale.handle.wait_started(0)
+
+
+def test_cancel_by_key():
+    queue = main.SpeechQueue()
+    queue.put(main.SpeechItem("a", key="time"))
+    queue.put(main.SpeechItem("b"))
+    assert queue.cancel("time") == 1
+    assert [item.text for item in drain(queue)] == ["b"]
+
+
+def test_stream_sentences_stay_in_order():
+    queue = main.SpeechQueue()
+    stream = main.SpeechStream()
+    for sentence in main.split_sentences(["One. Two", ". Three."]):
+        item = main.SpeechItem(sentence)
+        stream.add(item)
+        queue.put(item)
+    queue.put(main.SpeechItem("One."))  # same text, but not part of the stream
+    assert [item.text for item in drain(queue)] == ["One.", "Two.", "Three.", "One."]
+
+
+def test_put_after_close_cancels_the_item():
+    queue = main.SpeechQueue()
+    queue.close()
+    item = main.SpeechItem("GOODBYE")
+    queue.put(item)
+    assert item.handle.done.result(timeout=0) == "cancelled"
+    assert queue.depth() == 0
+
+
+class FakeStream:
+    def __init__(self):
+        self.written = []
+    
+    def write(self, chunk):
+        self.written.append(chunk)
+    
+    def stop_stream(self):
+        pass
+    
+    abort_stream = close = stop_stream
+
+
+class FakePyAudio:
+    def __init__(self):
+        self.stream = FakeStream()
+    
+    def get_format_from_width(self, width):
+        return width
+    
+    def open(self, **kwargs):
+        return self.stream
+
+
+def make_player():
+    player = main.AudioPlayer(main.EchoReference())
+    player.audio = FakePyAudio()
+    return player
+
+
+def test_player_plays_to_the_end():
+    player = make_player()
+    assert player.play(bytes(4 * main.PLAYBACK_CHUNK * 2), 16000, 2, cancelled=lambda: False)
+    assert len(player.audio.stream.written) == 4
+
+
+def test_stop_that_landed_before_play_still_counts():
+    player = make_player()
+    player.stop()  # the interrupt, while the worker was still rendering
+    assert not player.play(bytes(4 * main.PLAYBACK_CHUNK * 2), 16000, 2, cancelled=lambda: True)
+    assert player.audio.stream.written == []
@@ -0,0 +1,50 @@
+import pytest
+
+import main
+from main import ListeningState
+
+
+@pytest.fixture
+def state():
+    manager = main.StateManager(timeouts={ListeningState.WAKE_WORD_DETECTED: 0.1})
+    yield manager
+    manager.close()
+
+
+def test_allowed_and_rejected_transitions(state):
+    assert state.set_state(ListeningState.LISTENING_FOR_COMMAND) is False
+    assert state.stats["rejected"] == 1
+    assert state.set_state(ListeningState.WAKE_WORD_DETECTED)
+    assert state.set_state(ListeningState.LISTENING_FOR_COMMAND)
+    assert state.get_state() == ListeningState.LISTENING_FOR_COMMAND
+
+
+def test_expected_state_is_compare_and_set(state):
+    assert state.set_state(ListeningState.PAUSED)
+    assert state.set_state(ListeningState.IDLE, expected=ListeningState.PROCESSING) is False
+    assert state.get_state() == ListeningState.PAUSED
+    assert state.set_state(ListeningState.IDLE, expected=ListeningState.PAUSED)
+
+
+def test_observers_see_every_transition(state):
+    seen = []
+    state.subscribe(lambda old, new, dwell: seen.append((old, new)))
+    state.set_state(ListeningState.PROCESSING)
+    state.set_state(ListeningState.IDLE)
+    assert seen == [(ListeningState.IDLE, ListeningState.PROCESSING),
+                    (ListeningState.PROCESSING, ListeningState.IDLE)]
+
+
+def test_watchdog_returns_stuck_state_to_idle(state):
+    seen = []
+    state.subscribe(lambda old, new, dwell: seen.append(new))
+    state.set_state(ListeningState.WAKE_WORD_DETECTED)
+    assert state.wait_for(ListeningState.IDLE, timeout=2.0) == ListeningState.IDLE
+    assert state.stats["timeouts"] == 1
+    assert seen == [ListeningState.WAKE_WORD_DETECTED, ListeningState.IDLE]
+
+
+def test_states_without_timeout_are_left_alone(state):
+    state.set_state(ListeningState.PROCESSING)
+    assert state.wait_for(ListeningState.IDLE, timeout=0.3) is None
+    assert state.stats["timeouts"] == 0
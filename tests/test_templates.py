@@ -0,0 +1,62 @@
+import array
+import time
+
+import pytest
+
+import main
+
+
+def moment(hour, minute):
+    return time.struct_time((2024, 1, 1, hour, minute, 0, 0, 1, -1))
+
+
+@pytest.mark.parametrize("hour, minute, spoken", [
+    (0, 0, "THE TIME IS TWELVE O'CLOCK AM"),
+    (12, 0, "THE TIME IS TWELVE O'CLOCK PM"),
+    (15, 7, "THE TIME IS THREE OH SEVEN PM"),
+    (9, 10, "THE TIME IS NINE TEN AM"),
+    (23, 45, "THE TIME IS ELEVEN FORTY FIVE PM"),
+])
+def test_time_words(hour, minute, spoken):
+    assert main.time_words(moment(hour, minute)) == spoken
+
+
+@pytest.fixture
+def templates():
+    return main.SpeechTemplates(cache=None)
+
+
+def test_every_time_can_be_stitched(templates):
+    for hour in range(24):
+        for minute in range(60):
+            assert templates.split(main.time_words(moment(hour, minute))) is not None
+
+
+def test_split_prefers_the_longest_fragment(templates):
+    assert templates.split("THE TIME IS FORTY TWO PERCENT") == ["THE TIME IS", "FORTY", "TWO", "PERCENT"]
+
+
+def test_split_rejects_unknown_words(templates):
+    assert templates.split("THE TIME IS LATE") is None
+
+
+def constant(samples, level=8000):
+    return array.array("h", [level] * samples).tobytes()
+
+
+def test_prepare_fades_both_edges(templates):
+    rate = 16000
+    pcm = array.array("h", templates._prepare(constant(rate // 10), rate, 2, 1))
+    fade = int(rate * main.TEMPLATE_FADE_SECONDS)
+    block = fade // 8
+    assert len(pcm) == rate // 10
+    assert set(pcm[:block]) == {0} and set(pcm[-block:]) == {0}
+    assert set(pcm[block:2 * block]) == {1000}  # second of eight steps
+    assert set(pcm[fade:-fade]) == {8000}
+
+
+def test_prepare_fade_fits_short_fragments(templates):
+    pcm = array.array("h", templates._prepare(constant(10), 16000, 2, 1))
+    assert len(pcm) == 10
+    assert pcm[0] == 0 and pcm[-1] == 0
+    assert max(pcm) < 8000  # every sample is on one ramp or the other
@@ -0,0 +1,50 @@
+import array
+import math
+
+import pytest
+
+import main
+
+
+def clip(rate, quiet=0.5, loud=0.3):
+    """quiet seconds of silence, loud seconds of tone, quiet seconds of silence"""
+    gap = bytes(2 * int(rate * quiet))
+    samples = array.array("h", (int(6000 * math.sin(2 * math.pi * 220 * n / rate)) for n in range(int(rate * loud))))
+    return gap + samples.tobytes() + gap
+
+
+@pytest.fixture
+def preparer(recognizer):
+    return main.UploadPreparer(recognizer)
+
+
+def seconds(raw, rate):
+    return len(raw) / (2 * rate)
+
+
+def test_trim_keeps_speech_plus_padding(preparer):
+    trimmed = preparer.trim(clip(16000), 16000, 2)
+    assert seconds(trimmed, 16000) == pytest.approx(0.3 + 2 * main.UPLOAD_PADDING_SECONDS, abs=0.011)
+
+
+def test_trim_never_cuts_past_the_clip(preparer):
+    trimmed = preparer.trim(clip(16000, quiet=0.05), 16000, 2)
+    assert trimmed == clip(16000, quiet=0.05)
+
+
+def test_trim_leaves_silence_alone(preparer):
+    raw = bytes(2 * 16000)
+    assert preparer.trim(raw, 16000, 2) == raw
+
+
+def test_prepare_resamples_down_to_upload_rate(preparer, sr):
+    prepared = preparer.prepare(sr.AudioData(clip(48000), 48000, 2), encode=False)
+    assert prepared.sample_rate == main.UPLOAD_SAMPLE_RATE
+    assert prepared.sample_width == 2
+    assert seconds(prepared.frame_data, prepared.sample_rate) == pytest.approx(0.5, abs=0.011)
+    assert preparer.stats["upload_bytes"] == len(prepared.frame_data)
+
+
+def test_prepare_never_upsamples(preparer, sr):
+    prepared = preparer.prepare(sr.AudioData(clip(8000), 8000, 2), encode=False)
+    assert prepared.sample_rate == 8000
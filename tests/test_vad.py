@@ -0,0 +1,61 @@
+import array
+import math
+import types
+
+import main
+
+RATE = 16000
+CHUNK = 1024
+SECONDS_PER_CHUNK = CHUNK / RATE
+
+
+def silence(chunks):
+    return [bytes(2 * CHUNK)] * chunks
+
+
+def tone(chunks, amplitude=6000, frequency=220):
+    samples = array.array("h", (int(amplitude * math.sin(2 * math.pi * frequency * n / RATE))
+                                for n in range(CHUNK * chunks)))
+    data = samples.tobytes()
+    return [data[i:i + 2 * CHUNK] for i in range(0, len(data), 2 * CHUNK)]
+
+
+def make_source(chunks):
+    ring = main.AudioRingBuffer(len(chunks) + 1)
+    for chunk in chunks:
+        ring.append(chunk)
+    ring.close()
+    return types.SimpleNamespace(stream=main.RingBufferReader(ring, 0), SAMPLE_WIDTH=2,
+                                 SAMPLE_RATE=RATE, CHUNK=CHUNK, capture=None)
+
+
+def test_segment_boundaries(recognizer):
+    vad = main.VoiceActivityDetector(recognizer)
+    source = make_source(silence(10) + tone(20) + silence(30))
+    segment = vad.next_segment(source)
+    assert segment is not None
+    assert segment.start_position == 10
+    assert segment.end_position == 30
+    padding = max(1, int(main.VAD_PADDING_SECONDS / SECONDS_PER_CHUNK))
+    assert len(segment.audio.frame_data) == 2 * CHUNK * (20 + 2 * padding)
+    assert vad.next_segment(source) is None
+
+
+def test_short_bursts_are_dropped(recognizer):
+    vad = main.VoiceActivityDetector(recognizer)
+    source = make_source(silence(5) + tone(2) + silence(30))
+    assert vad.next_segment(source) is None
+    assert vad.stats["noise_discarded"] == 1
+    assert vad.stats["segments"] == 0
+
+
+def test_timeout_in_audio_seconds(recognizer):
+    vad = main.VoiceActivityDetector(recognizer)
+    source = make_source(silence(40) + tone(20) + silence(30))
+    assert vad.next_segment(source, timeout=1.0) is None
+
+
+def test_quiet_audio_is_not_speech(recognizer):
+    vad = main.VoiceActivityDetector(recognizer)
+    assert vad.classify(tone(1, amplitude=100)[0], 2)[0] is False
+    assert vad.classify(tone(1)[0], 2)[0] is True
@@ -0,0 +1,19 @@
+import importlib.util
+
+import main
+
+
+def test_missing_pocketsphinx_is_reported_as_gating_off(recognizer, monkeypatch, capsys):
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    detector = main.WakeWordDetector(recognizer)
+    out = capsys.readouterr().out
+    assert "Wake word gating is OFF" in out
+    assert "initialized" not in out
+    assert "(gating off)" in detector.report()
+
+
+def test_gate_rejects_short_and_quiet_clips(recognizer, sr, monkeypatch):
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    detector = main.WakeWordDetector(recognizer)
+    assert not detector.detect(sr.AudioData(bytes(3200), 16000, 2)).fired  # 0.1 s of silence
+    assert detector.stats["rejected"] == 1